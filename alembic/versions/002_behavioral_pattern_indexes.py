@@ -0,0 +1,46 @@
+"""Behavioral pattern lookup indexes
+
+Add a composite index backing get_patterns_by_user and a partial index
+for get_high_confidence_patterns
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # Covers user_id / pattern_type filters, the next_analysis_date range
+        # and the confidence_score ordering in one index seek
+        op.create_index(
+            'ix_bp_user_type_nad_conf',
+            'behavioral_patterns',
+            ['user_id', 'pattern_type', sa.text('next_analysis_date DESC'), sa.text('confidence_score DESC')],
+            postgresql_concurrently=True
+        )
+        
+        # Partial (filtered on MSSQL) index for high-confidence pattern scans
+        op.create_index(
+            'ix_bp_confidence_desc',
+            'behavioral_patterns',
+            [sa.text('confidence_score DESC')],
+            postgresql_where=sa.text('confidence_score >= 0.8'),
+            mssql_where=sa.text('confidence_score >= 0.8'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_bp_confidence_desc', table_name='behavioral_patterns', postgresql_concurrently=True)
+        op.drop_index('ix_bp_user_type_nad_conf', table_name='behavioral_patterns', postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""Employee branch lookup indexes
+
+Add a composite index backing branch employee lookups and counts, and a
+partial index for the active-employee path
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # Covers branch_id / is_active / role filters and the grouped
+        # role counts as an index-only scan
+        op.create_index(
+            'ix_employee_branch_active_role',
+            'employees',
+            ['branch_id', 'is_active', 'role'],
+            postgresql_concurrently=True
+        )
+        
+        # Partial index for the default active-only lookups
+        op.create_index(
+            'ix_employee_branch_active_partial',
+            'employees',
+            ['branch_id', 'role'],
+            postgresql_where=sa.text('is_active'),
+            mssql_where=sa.text('is_active = 1'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_employee_branch_active_partial', table_name='employees', postgresql_concurrently=True)
+        op.drop_index('ix_employee_branch_active_role', table_name='employees', postgresql_concurrently=True)
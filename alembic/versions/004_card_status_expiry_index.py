@@ -0,0 +1,35 @@
+"""Card expiry lookup index
+
+Add a partial index backing get_expiring_cards
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # Partial index over usable cards only, ordered for the expiry range scan
+        op.create_index(
+            'ix_card_status_expiry',
+            'cards',
+            ['status', 'expiry_date'],
+            postgresql_where=sa.text("status IN ('ACTIVE', 'PENDING_ACTIVATION')"),
+            mssql_where=sa.text("status IN ('ACTIVE', 'PENDING_ACTIVATION')"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_card_status_expiry', table_name='cards', postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Card transaction history index
+
+Add a (card_id, transaction_date DESC) index backing batched card transaction reads
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # Serves the card_id IN (...) range scan and the per-card ROW_NUMBER() ranking
+        op.create_index(
+            'ix_transaction_card_date',
+            'transactions',
+            ['card_id', sa.text('transaction_date DESC')],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transaction_card_date', table_name='transactions', postgresql_concurrently=True)
@@ -0,0 +1,50 @@
+"""Fraud alert lookup indexes
+
+Add newest-first per-user and per-account alert indexes and a partial index
+over open alerts ranked by risk
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_fraud_alert_user_created',
+            'fraud_alerts',
+            ['user_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_fraud_alert_account_created',
+            'fraud_alerts',
+            ['account_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True
+        )
+        # Partial index over open alerts only, ordered for the top-k risk scan
+        op.create_index(
+            'ix_fraud_high_risk',
+            'fraud_alerts',
+            [sa.text('risk_score DESC'), 'created_at'],
+            postgresql_where=sa.text("status IN ('ACTIVE', 'INVESTIGATING')"),
+            mssql_where=sa.text("status IN ('ACTIVE', 'INVESTIGATING')"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_fraud_high_risk', table_name='fraud_alerts', postgresql_concurrently=True)
+        op.drop_index('ix_fraud_alert_account_created', table_name='fraud_alerts', postgresql_concurrently=True)
+        op.drop_index('ix_fraud_alert_user_created', table_name='fraud_alerts', postgresql_concurrently=True)
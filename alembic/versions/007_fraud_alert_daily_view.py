@@ -0,0 +1,55 @@
+"""Daily fraud alert rollup view
+
+Add the fraud_alert_daily indexed view that get_fraud_trends reads instead of
+aggregating fraud_alerts on every call
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQL Server maintains an indexed view with every write to fraud_alerts, so
+    # the rollup is never stale and needs no refresh job. Other dialects have
+    # no equivalent; the repository aggregates fraud_alerts directly there.
+    if op.get_bind().dialect.name != 'mssql':
+        return
+
+    # Indexed views require SCHEMABINDING, COUNT_BIG(*) and non-nullable SUM
+    # arguments. Sums and counts rather than averages, so days combine exactly.
+    op.execute("""
+        CREATE VIEW dbo.fraud_alert_daily WITH SCHEMABINDING AS
+        SELECT
+            CAST(created_at AS DATE) AS day,
+            alert_type,
+            severity,
+            COUNT_BIG(*) AS alert_count,
+            SUM(CASE WHEN is_confirmed_fraud = 1 THEN 1 ELSE 0 END) AS confirmed,
+            SUM(CASE WHEN is_false_positive = 1 THEN 1 ELSE 0 END) AS false_positives,
+            SUM(CASE WHEN status = 'ACTIVE' THEN 1 ELSE 0 END) AS pending,
+            SUM(ISNULL(risk_score, 0)) AS risk_sum,
+            SUM(CASE WHEN risk_score IS NULL THEN 0 ELSE 1 END) AS risk_count
+        FROM dbo.fraud_alerts
+        GROUP BY CAST(created_at AS DATE), alert_type, severity
+    """)
+    # The unique clustered index is what materializes the view
+    op.execute("""
+        CREATE UNIQUE CLUSTERED INDEX ux_fraud_alert_daily
+        ON dbo.fraud_alert_daily (day, alert_type, severity)
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'mssql':
+        return
+
+    op.execute("DROP VIEW IF EXISTS dbo.fraud_alert_daily")
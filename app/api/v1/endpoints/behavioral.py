@@ -13,8 +13,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
 from app.core.llm_orchestrator import LLMOrchestrator, TaskType, TaskComplexity, LLMResponse
-from app.core.memory_manager import MemoryManager
 from app.api.v1.dependencies import get_current_active_user, get_async_db
+from app.repositories.enhanced_base import CacheManager
 from app.repositories.enhanced_behavioral_pattern import EnhancedBehavioralPatternRepository
 from app.schemas.behavioral import (
     Transaction,
@@ -36,8 +36,8 @@ async def get_behavioral_repository(
 ) -> EnhancedBehavioralPatternRepository:
     """Dependency to get a behavioral pattern repository."""
     llm_orchestrator = LLMOrchestrator()
-    memory_manager = MemoryManager()
-    return EnhancedBehavioralPatternRepository(db, llm_orchestrator, memory_manager)
+    cache_manager = CacheManager()
+    return EnhancedBehavioralPatternRepository(db, llm_orchestrator, cache_manager)
 
 @router.post("/analyze", response_model=StandardResponse)
 async def analyze_behavior(
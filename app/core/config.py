@@ -34,6 +34,15 @@ class Settings(BaseSettings):
     DB_USER: str = Field(..., env="DB_USER")
     DB_PASSWORD: str = Field(..., env="DB_PASSWORD")
     
+    # Connection pool sizing for the async engine. Batch helpers that fan out
+    # database work (max_concurrency arguments) must stay at or below DB_POOL_SIZE,
+    # otherwise the extra tasks just queue on pool checkout
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_WARM_ON_STARTUP: bool = True  # Open DB_POOL_SIZE connections at startup
+    
     # API Keys
     API_KEY: Optional[str] = None
     API_URL: Optional[str] = None
@@ -47,6 +56,8 @@ class Settings(BaseSettings):
 
     # Rate limiting
     RATE_LIMIT: Optional[int] = None
+    LLM_REQUESTS_PER_MINUTE: Optional[int] = None  # Unset disables LLM request throttling
+    LLM_MAX_CONCURRENCY: Optional[int] = 32  # Concurrent model calls per process; unset for no bound
 
     # Additional API Keys
     GPT_MODEL_NAME: Optional[str] = None
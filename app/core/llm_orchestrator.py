@@ -1,6 +1,9 @@
 """LLM Orchestrator for intelligent model selection and management."""
 
+import asyncio
+import contextlib
 import logging
+import time
 from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional, Any
@@ -35,6 +38,8 @@ class LLMRequest(BaseModel):
     context: Optional[Dict[str, Any]] = None
     temperature: float = 0.7
     max_tokens: int = 1000
+    timeout: Optional[float] = 30.0  # Seconds per model call; None waits indefinitely
+    max_retries: int = 2  # Fallback attempts after the first model fails
 
 class LLMResponse(BaseModel):
     """Response structure from LLM processing."""
@@ -44,6 +49,43 @@ class LLMResponse(BaseModel):
     processing_time: float
     metadata: Dict[str, Any] = {}
 
+class RateLimiter:
+    """
+    Token-bucket limiter for outgoing LLM requests.
+    
+    Allows bursts of up to ``requests_per_minute`` requests and refills
+    continuously, so callers wait before a provider would answer with 429.
+    """
+    
+    def __init__(self, requests_per_minute: int):
+        self.capacity = float(requests_per_minute)
+        self.tokens = self.capacity
+        self.refill_rate = requests_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.refill_rate)
+
+# Shared by every orchestrator instance in the process, since provider limits are per key
+_rate_limiter = (
+    RateLimiter(settings.LLM_REQUESTS_PER_MINUTE) if settings.LLM_REQUESTS_PER_MINUTE else None
+)
+
+# Bounds model calls in flight across the process, keeping tail latency stable under bursts
+_concurrency_limit = (
+    asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY) if settings.LLM_MAX_CONCURRENCY else None
+)
+
 class LLMOrchestrator:
     """
     Intelligent LLM orchestrator that selects optimal models based on task requirements.
@@ -105,6 +147,10 @@ class LLMOrchestrator:
         """
         Process an LLM request with intelligent model selection and fallback.
         
+        Each model call is bounded by ``request.timeout``; a failed or timed-out
+        call is retried on the next fallback model, up to ``request.max_retries``
+        times.
+        
         Args:
             request: The LLM request to process.
             
@@ -114,8 +160,6 @@ class LLMOrchestrator:
         Raises:
             ValueError: If no suitable model is found for the task.
         """
-        start_time = datetime.utcnow()
-        
         # Select the best model for the task
         model_id = self._select_model(request.task_type, request.complexity)
         if not model_id:
@@ -124,34 +168,45 @@ class LLMOrchestrator:
         
         logger.info(f"Selected model {model_id} for {request.task_type} task")
         
-        try:
-            # Process the request with the selected model
-            response = await self._call_model(model_id, request)
-            end_time = datetime.utcnow()
-            processing_time = (end_time - start_time).total_seconds()
-            
-            # Update metrics
-            self._update_metrics(model_id, success=True, processing_time=processing_time)
+        for attempt in range(request.max_retries + 1):
+            # Throttle before timing so waiting does not count as model latency
+            if _rate_limiter is not None:
+                await _rate_limiter.acquire()
             
-            return LLMResponse(
-                content=response,
-                model_used=model_id,
-                tokens_used=len(response.split()),  # Approximation
-                processing_time=processing_time,
-                metadata={"model_id": model_id}
-            )
+            start_time = datetime.utcnow()
             
-        except Exception as e:
-            logger.error(f"Error processing request with {model_id}: {str(e)}")
-            self._update_metrics(model_id, success=False)
-            
-            # Try fallback model if available
-            fallback_model = self._get_fallback_model(model_id, request.task_type)
-            if fallback_model and fallback_model != model_id:
-                logger.info(f"Trying fallback model {fallback_model}")
-                return await self.process_request(request)  # Retry with fallback
+            try:
+                # Process the request with the current model
+                async with _concurrency_limit or contextlib.nullcontext():
+                    response = await asyncio.wait_for(self._call_model(model_id, request), timeout=request.timeout)
+                end_time = datetime.utcnow()
+                processing_time = (end_time - start_time).total_seconds()
                 
-            raise  # Re-raise if no fallback available or fallback also failed
+                # Update metrics
+                self._update_metrics(model_id, success=True, processing_time=processing_time)
+                
+                return LLMResponse(
+                    content=response,
+                    model_used=model_id,
+                    tokens_used=len(response.split()),  # Approximation
+                    processing_time=processing_time,
+                    metadata={"model_id": model_id}
+                )
+                
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    logger.error(f"Request to {model_id} timed out after {request.timeout}s")
+                else:
+                    logger.error(f"Error processing request with {model_id}: {str(e)}")
+                self._update_metrics(model_id, success=False)
+                
+                # Try fallback model if available
+                fallback_model = self._get_fallback_model(model_id, request.task_type)
+                if attempt == request.max_retries or not fallback_model or fallback_model == model_id:
+                    raise  # Re-raise if no fallback available or retries are exhausted
+                
+                logger.info(f"Trying fallback model {fallback_model}")
+                model_id = fallback_model
     
     def _select_model(self, task_type: TaskType, complexity: TaskComplexity) -> Optional[str]:
         """Select the most appropriate model for the given task and complexity."""
@@ -4,6 +4,7 @@ Database configuration and session management for Azure SQL.
 This module provides a database connection manager with dependency injection
 for SQLAlchemy async sessions, optimized for Azure SQL Database.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Optional, Any
@@ -67,10 +68,11 @@ class Database:
         self.async_engine = create_async_engine(
             async_database_url,
             # Remove poolclass for async engines - let SQLAlchemy choose the appropriate pool
-            pool_size=5,  # Default pool size
-            max_overflow=10,  # Default max overflow
-            pool_timeout=30,  # Default timeout in seconds
-            pool_recycle=1800,  # Recycle connections after 30 minutes
+            # Sized for concurrent repository fan-out rather than one query per request
+            pool_size=self.settings.DB_POOL_SIZE,
+            max_overflow=self.settings.DB_MAX_OVERFLOW,
+            pool_timeout=self.settings.DB_POOL_TIMEOUT,
+            pool_recycle=self.settings.DB_POOL_RECYCLE,
             pool_pre_ping=True,  # Enable connection health checks
             echo=True,  # Enable SQL query logging for debugging
             future=True,  # Use SQLAlchemy 2.0 style APIs
@@ -178,6 +180,30 @@ class Database:
             result = await connection.execute(text(sql), params or {})
             return result
     
+    async def warm_pool(self) -> int:
+        """Open ``DB_POOL_SIZE`` connections up front and return them to the pool.
+        
+        The first burst of requests then reuses established connections instead
+        of each paying the TCP/TLS/login handshake.
+        
+        Returns:
+            The number of connections opened
+        """
+        if self.async_engine is None:
+            raise RuntimeError("Database async engine not initialized")
+            
+        results = await asyncio.gather(
+            *(self.async_engine.connect().start() for _ in range(self.settings.DB_POOL_SIZE)),
+            return_exceptions=True
+        )
+        connections = [result for result in results if not isinstance(result, Exception)]
+        await asyncio.gather(*(connection.close() for connection in connections))
+        
+        failures = len(results) - len(connections)
+        if failures:
+            logger.warning("Failed to open %d of %d pooled connections", failures, len(results))
+        return len(connections)
+    
     async def health_check(self) -> bool:
         """Check if the database is accessible."""
         try:
@@ -74,6 +74,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         logger.info("Initializing database connections...")
         async with db.async_engine.begin() as conn:
             await conn.run_sync(lambda conn: logger.info("Database connection established"))
+        if db.settings.DB_POOL_WARM_ON_STARTUP:
+            warmed = await db.warm_pool()
+            logger.info(f"Database connection pool warmed with {warmed} connections")
         
         logger.info("✅ Application startup complete")
         
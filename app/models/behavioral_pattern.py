@@ -3,7 +3,7 @@ Behavioral Pattern model for AI-driven customer behavior analysis.
 """
 from datetime import date, datetime
 from enum import Enum
-from typing import Dict, Any, List, Optional
+from typing import Any, Callable, Dict, List, Mapping, Optional
 from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, DateTime, Date, Float, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
@@ -66,6 +66,16 @@ class BehavioralPattern(ModelBase):
         Index('idx_analysis_period', 'analysis_period_start', 'analysis_period_end'),
         Index('idx_confidence_score', 'confidence_score'),
         Index('idx_next_analysis', 'next_analysis_date'),
+        Index(
+            'ix_bp_user_type_nad_conf',
+            user_id, pattern_type, next_analysis_date.desc(), confidence_score.desc()
+        ),
+        Index(
+            'ix_bp_confidence_desc',
+            confidence_score.desc(),
+            postgresql_where=confidence_score >= 0.8,
+            mssql_where=confidence_score >= 0.8
+        ),
         {'extend_existing': True}
     )
     
@@ -74,34 +84,50 @@ class BehavioralPattern(ModelBase):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dictionary."""
+        return self._serialize(lambda name: getattr(self, name))
+    
+    @classmethod
+    def row_to_dict(cls, row: Mapping[str, Any]) -> Dict[str, Any]:
+        """Convert a column-mapping row (e.g. from ``result.mappings()``) to the ``to_dict`` shape."""
+        return cls._serialize(row.get)
+    
+    @staticmethod
+    def _serialize(get: Callable[[str], Any]) -> Dict[str, Any]:
+        """Build the dictionary representation from a column getter."""
+        pattern_type = get('pattern_type')
+        analysis_period_start = get('analysis_period_start')
+        analysis_period_end = get('analysis_period_end')
+        next_analysis_date = get('next_analysis_date')
+        created_at = get('created_at')
+        updated_at = get('updated_at')
         return {
-            'pattern_id': self.pattern_id,
-            'user_id': self.user_id,
-            'pattern_type': self.pattern_type.value if self.pattern_type else None,
+            'pattern_id': get('pattern_id'),
+            'user_id': get('user_id'),
+            'pattern_type': pattern_type.value if pattern_type else None,
             'analysis_period': {
-                'start': self.analysis_period_start.isoformat() if self.analysis_period_start else None,
-                'end': self.analysis_period_end.isoformat() if self.analysis_period_end else None
+                'start': analysis_period_start.isoformat() if analysis_period_start else None,
+                'end': analysis_period_end.isoformat() if analysis_period_end else None
             },
             'spending_analysis': {
-                'categories': self.spending_categories,
-                'monthly_average': self.monthly_average_spending,
-                'volatility': self.spending_volatility,
-                'trends': self.spending_trends
+                'categories': get('spending_categories'),
+                'monthly_average': get('monthly_average_spending'),
+                'volatility': get('spending_volatility'),
+                'trends': get('spending_trends')
             },
             'behavioral_insights': {
-                'seasonal_patterns': self.seasonal_patterns,
-                'behavioral_biases': self.behavioral_biases,
-                'risk_indicators': self.risk_indicators,
-                'unusual_patterns': self.unusual_patterns
+                'seasonal_patterns': get('seasonal_patterns'),
+                'behavioral_biases': get('behavioral_biases'),
+                'risk_indicators': get('risk_indicators'),
+                'unusual_patterns': get('unusual_patterns')
             },
             'ai_analysis': {
-                'confidence_score': self.confidence_score,
-                'insights': self.ai_insights,
-                'recommendations': self.recommendations
+                'confidence_score': get('confidence_score'),
+                'insights': get('ai_insights'),
+                'recommendations': get('recommendations')
             },
-            'next_analysis_date': self.next_analysis_date.isoformat() if self.next_analysis_date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'next_analysis_date': next_analysis_date.isoformat() if next_analysis_date else None,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None
         }
     
     @classmethod
@@ -153,6 +153,18 @@ class Employee(ModelBase):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     user = relationship("User", back_populates="employee_profile")
     
+    # Indexes
+    __table_args__ = (
+        Index('ix_employee_branch_active_role', branch_id, is_active, role),
+        Index(
+            'ix_employee_branch_active_partial',
+            branch_id, role,
+            postgresql_where=is_active == True,  # noqa: E712
+            mssql_where=is_active == True  # noqa: E712
+        ),
+        {'extend_existing': True}
+    )
+    
     @property
     def full_name(self) -> str:
         """Return the employee's full name."""
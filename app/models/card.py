@@ -272,6 +272,13 @@ class Card(ModelBase):
         Index('idx_card_account', 'account_id', 'status'),
         Index('idx_card_user', 'user_id', 'status'),
         Index('idx_card_expiry', 'expiry_date', 'status'),
+        # Partial index for get_expiring_cards, which only scans usable cards
+        Index(
+            'ix_card_status_expiry',
+            'status', 'expiry_date',
+            postgresql_where=text("status IN ('ACTIVE', 'PENDING_ACTIVATION')"),
+            mssql_where=text("status IN ('ACTIVE', 'PENDING_ACTIVATION')")
+        ),
         
         # Check constraints
         CheckConstraint('expiry_month BETWEEN 1 AND 12', name='check_valid_expiry_month'),
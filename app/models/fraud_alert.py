@@ -12,9 +12,9 @@ from typing import Dict, Any, List, Optional, Union, Literal, TypedDict
 from uuid import uuid4
 
 from sqlalchemy import (
-    Column, Integer, String, Text, ForeignKey, DateTime, 
+    Column, Integer, String, Text, ForeignKey, DateTime, Date,
     Float, Enum as SQLEnum, Index, Boolean, CheckConstraint,
-    UniqueConstraint, event, DDL
+    UniqueConstraint, event, DDL, text, MetaData, Table
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, validates
@@ -207,6 +207,16 @@ class FraudAlert(ModelBase):
         Index('idx_alert_risk_severity', 'risk_score', 'severity'),
         Index('idx_alert_created', 'created_at'),
         Index('idx_alert_reference', 'alert_reference', unique=True),
+        # Newest-first alert lists per user and per account
+        Index('ix_fraud_alert_user_created', user_id, created_at.desc()),
+        Index('ix_fraud_alert_account_created', account_id, created_at.desc()),
+        # Open alerts ranked by risk for get_high_risk_alerts
+        Index(
+            'ix_fraud_high_risk',
+            risk_score.desc(), created_at,
+            postgresql_where=text("status IN ('ACTIVE', 'INVESTIGATING')"),
+            mssql_where=text("status IN ('ACTIVE', 'INVESTIGATING')")
+        ),
         {'extend_existing': True}
     )
     
@@ -259,6 +269,19 @@ class FraudAlert(ModelBase):
             'metadata': self.metadata_
         }
     
+    def to_analysis_dict(self) -> Dict[str, Any]:
+        """Convert model to the narrow dictionary sent to AI analyses."""
+        return {
+            'alert_id': self.alert_id,
+            'alert_type': self.alert_type.value if self.alert_type else None,
+            'severity': self.severity.value if self.severity else None,
+            'risk_score': self.risk_score,
+            'status': self.status.value if self.status else None,
+            'is_confirmed_fraud': self.is_confirmed_fraud,
+            'is_false_positive': self.is_false_positive,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def mark_investigating(self, investigator: str, notes: str = None):
         """Mark the alert as under investigation."""
         self.status = FraudAlertStatus.INVESTIGATING
@@ -302,3 +325,21 @@ class FraudAlert(ModelBase):
         
         self.actions_taken.append(action)
         return action
+
+
+# Daily rollup of fraud_alerts, created as an indexed view by migration 007 on
+# SQL Server only. Kept off ModelBase.metadata so create_all() never tries to
+# create it as a table.
+fraud_alert_daily = Table(
+    'fraud_alert_daily',
+    MetaData(),
+    Column('day', Date, primary_key=True),
+    Column('alert_type', SQLEnum(FraudAlertType), primary_key=True),
+    Column('severity', SQLEnum(FraudAlertSeverity), primary_key=True),
+    Column('alert_count', Integer, nullable=False),
+    Column('confirmed', Integer, nullable=False),
+    Column('false_positives', Integer, nullable=False),
+    Column('pending', Integer, nullable=False),
+    Column('risk_sum', Float),
+    Column('risk_count', Integer, nullable=False)
+)
@@ -119,6 +119,8 @@ class Transaction(ModelBase):
         Index('idx_transaction_reference', 'reference_id', unique=True),
         Index('idx_transaction_type_status', 'transaction_type', 'status'),
         Index('idx_transaction_category', 'category'),
+        # Per-card history lookups, newest first (batched card transaction reads)
+        Index('ix_transaction_card_date', card_id, transaction_date.desc()),
         {'extend_existing': True}
     )
     
@@ -4,11 +4,19 @@ Enhanced base repository with AI integration, caching, and advanced analytics.
 from __future__ import annotations
 
 import asyncio
+import calendar
+import fnmatch
+import functools
+import hashlib
 import json
 import logging
+import re
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union, Tuple
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, List, Optional, Type, TypeVar, Union, Tuple
 from uuid import UUID
 
 from sqlalchemy import and_, delete, select, update, func, text
@@ -28,6 +36,89 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=dict)
 logger = logging.getLogger(__name__)
 
 
+def _json_default(value: Any) -> Any:
+    """Encode values the stdlib JSON encoder does not handle natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps_payload(data: Any) -> str:
+    """Serialize an AI payload for embedding in a prompt."""
+    return json.dumps(data, indent=2, default=_json_default)
+
+
+def _cache_key_part(value: Any, default: str = "") -> str:
+    """
+    Normalize one cache-key segment.
+    
+    Enums become their value and ``None`` becomes ``default``; a ':' inside the
+    value is escaped so it cannot collide with the key separator.
+    """
+    if value is None:
+        return default
+    if isinstance(value, Enum):
+        value = value.value
+    return str(value).replace(":", "%3A")
+
+
+# Weekday names indexed by datetime.weekday(), resolved once instead of strftime per row
+_DAY_NAMES = tuple(calendar.day_name)
+
+# Transaction lists at least this long are aggregated in a worker thread, so
+# a large analysis does not block the event loop; shorter ones run inline
+# because the thread hop would cost more than the aggregation
+_THREAD_OFFLOAD_ROWS = 5000
+
+
+async def _run_analyzer(
+    analyzer: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+    transactions: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Run a synchronous pattern analyzer, off the event loop for large inputs."""
+    if len(transactions) >= _THREAD_OFFLOAD_ROWS:
+        return await asyncio.to_thread(analyzer, transactions)
+    return analyzer(transactions)
+
+
+# How long an AI analysis stays reusable for an identical payload
+_AI_RESPONSE_CACHE_TTL = 3600
+
+
+def _ai_response_cache_key(
+    data: Dict[str, Any],
+    analysis_type: TaskType,
+    complexity: TaskComplexity,
+    prompt: Optional[str] = None
+) -> str:
+    """
+    Content-addressed cache key for an AI analysis.
+    
+    The payload is serialized canonically (sorted keys, compact separators), so
+    identical inputs hash to the same key regardless of which entity produced them.
+    A custom prompt is hashed with the payload, since it changes the response.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=_json_default)
+    hasher = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16)
+    if prompt is not None:
+        hasher.update(prompt.encode("utf-8"))
+    digest = hasher.hexdigest()
+    return f"ai_response:{analysis_type.value}:{complexity.value}:{digest}"
+
+
+# Process-wide map of AI analyses currently running, keyed like the response
+# cache; repositories are per-request, so this cannot live on the instance
+_ai_in_flight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+# Characters that make a cache-key pattern a glob rather than an exact key
+_GLOB_CHARS = frozenset("*?[")
+
+
 class CacheManager:
     """Simple in-memory cache manager (can be replaced with Redis)."""
     
@@ -51,16 +142,132 @@ class CacheManager:
         expiry = datetime.now() + timedelta(seconds=ttl)
         self._cache[key] = (value, expiry)
     
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values from cache in one call (maps to Redis MGET)."""
+        return [await self.get(key) for key in keys]
+    
+    async def mset(self, items: Dict[str, Any], ttl: int = None) -> None:
+        """Set several values in cache in one call (maps to a Redis pipeline)."""
+        for key, value in items.items():
+            await self.set(key, value, ttl=ttl)
+    
+    async def incr(self, key: str) -> int:
+        """Increment an integer counter that never expires (maps to Redis INCR)."""
+        value = (await self.get(key) or 0) + 1
+        self._cache[key] = (value, datetime.max)
+        return value
+    
     async def delete(self, key: str) -> None:
         """Delete value from cache."""
         if key in self._cache:
             del self._cache[key]
     
+    async def delete_many(self, keys: List[str]) -> int:
+        """Delete several keys in one call (maps to Redis UNLINK). Returns the number deleted."""
+        deleted = 0
+        for key in keys:
+            if self._cache.pop(key, None) is not None:
+                deleted += 1
+        return deleted
+    
+    async def sadd(self, key: str, members: List[str], ttl: int = None) -> None:
+        """Add members to a set and refresh its expiry (maps to Redis SADD + EXPIRE)."""
+        existing = await self.get(key) or set()
+        await self.set(key, existing | set(members), ttl=ttl)
+    
+    async def sunion(self, keys: List[str]) -> set:
+        """Return the union of several sets (maps to Redis SUNION)."""
+        members = set()
+        for key in keys:
+            members |= await self.get(key) or set()
+        return members
+    
+    async def delete_patterns(self, patterns: List[str]) -> int:
+        """
+        Delete every key matching any of the glob patterns in one call.
+        
+        Patterns without wildcards are exact keys and are deleted directly
+        (a plain UNLINK on Redis); only real globs pay for a scan (SCAN MATCH
+        plus batched UNLINK), and all globs are matched in that one scan.
+        Returns the number of keys deleted.
+        """
+        exact_keys = [pattern for pattern in patterns if not _GLOB_CHARS.intersection(pattern)]
+        deleted = await self.delete_many(exact_keys)
+        
+        globs = [pattern for pattern in patterns if _GLOB_CHARS.intersection(pattern)]
+        if not globs:
+            return deleted
+        
+        matches = re.compile("|".join(fnmatch.translate(pattern) for pattern in globs)).match
+        matched = [key for key in self._cache if matches(key)]
+        for key in matched:
+            del self._cache[key]
+        return deleted + len(matched)
+    
     async def clear(self) -> None:
         """Clear all cache."""
         self._cache.clear()
 
 
+def async_memoize(
+    ttl: int,
+    key_fn: Callable[..., str],
+    version_key_fn: Optional[Callable[..., str]] = None
+):
+    """
+    Memoize an async repository method in ``self.cache_manager``.
+    
+    ``key_fn`` receives the method arguments (without ``self``) and returns the
+    cache key. Concurrent misses for the same key share a single in-flight call,
+    so a cold key hits the database once instead of once per caller. Falsy
+    results are not cached. Callers can pass ``use_cache=False`` to bypass it.
+    
+    ``version_key_fn`` names a counter, bumped with ``cache_manager.incr``,
+    whose current value is appended to the cache key; bumping it makes every
+    entry cached under the old value unreachable.
+    """
+    def decorator(method):
+        in_flight: Dict[str, asyncio.Future] = {}
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, use_cache: bool = True, **kwargs):
+            if not use_cache:
+                return await method(self, *args, **kwargs)
+
+            cache_key = key_fn(*args, **kwargs)
+            if version_key_fn is not None:
+                version = await self.cache_manager.get(version_key_fn(*args, **kwargs)) or 0
+                cache_key = f"{cache_key}:v{version}"
+            cached = await self.cache_manager.get(cache_key)
+            if cached:
+                return cached
+
+            pending = in_flight.get(cache_key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+
+            future = asyncio.get_running_loop().create_future()
+            in_flight[cache_key] = future
+            try:
+                result = await method(self, *args, **kwargs)
+                if result:
+                    await self.cache_manager.set(cache_key, result, ttl=ttl)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when no other caller was waiting
+                raise
+            finally:
+                del in_flight[cache_key]
+
+        return wrapper
+    return decorator
+
+
 class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Enhanced base repository with AI integration, caching, and advanced analytics.
@@ -180,7 +387,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         await self.db_session.refresh(db_obj)
         
         # Invalidate related caches
-        await self._invalidate_related_caches()
+        await self._invalidate_related_caches(db_obj)
         
         return db_obj
 
@@ -201,7 +408,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         await self.db_session.refresh(db_obj)
         
         # Invalidate related caches
-        await self._invalidate_related_caches()
+        await self._invalidate_related_caches(db_obj)
         
         return db_obj
 
@@ -211,7 +418,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         await self.db_session.commit()
         
         # Invalidate related caches
-        await self._invalidate_related_caches()
+        await self._invalidate_related_caches(db_obj)
 
     # ==================== AI Integration Methods ====================
     
@@ -219,27 +426,87 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         self, 
         data: Dict[str, Any], 
         analysis_type: TaskType,
-        complexity: TaskComplexity = TaskComplexity.MEDIUM
+        complexity: TaskComplexity = TaskComplexity.MEDIUM,
+        *,
+        timeout: Optional[float] = 20.0,
+        max_retries: int = 2,
+        max_output_tokens: int = 1000,
+        use_cache: bool = True,
+        prompt: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Analyze data using AI models."""
+        """
+        Analyze data using AI models.
+        
+        ``prompt`` replaces the default prompt for ``analysis_type``. Each model call is bounded by ``timeout`` seconds and ``max_output_tokens``,
+        with up to ``max_retries`` fallback attempts, so a degraded provider
+        cannot stall the caller.
+        
+        Results are cached by a hash of the payload, so structurally identical
+        inputs (even from different entities) reuse one model response, and
+        concurrent callers with the same payload await a single in-flight call.
+        """
         try:
-            prompt = self._create_analysis_prompt(data, analysis_type)
-            
+            cache_key = _ai_response_cache_key(data, analysis_type, complexity, prompt)
             request = LLMRequest(
-                prompt=prompt,
+                prompt=prompt if prompt is not None else self._create_analysis_prompt(data, analysis_type),
                 task_type=analysis_type,
                 complexity=complexity,
-                context=data
+                context=data,
+                max_tokens=max_output_tokens,
+                timeout=timeout,
+                max_retries=max_retries
             )
+            if not use_cache:
+                return await self._request_ai_analysis(request, cache_key)
             
-            response = await self.llm_orchestrator.process_request(request)
+            cached = await self.cache_manager.get(cache_key)
+            if cached is not None:
+                return cached
             
-            return self._parse_ai_response(response, analysis_type)
+            task = _ai_in_flight.get(cache_key)
+            if task is None:
+                task = asyncio.create_task(self._request_ai_analysis(request, cache_key))
+                _ai_in_flight[cache_key] = task
+                task.add_done_callback(lambda _: _ai_in_flight.pop(cache_key, None))
+            # Shielded so a cancelled caller does not cancel the call others share
+            return await asyncio.shield(task)
             
         except Exception as e:
             logger.error(f"AI analysis failed: {str(e)}")
             return {}
 
+    async def _request_ai_analysis(self, request: LLMRequest, cache_key: str) -> Dict[str, Any]:
+        """Send one analysis request to the orchestrator and cache a non-empty result."""
+        response = await self.llm_orchestrator.process_request(request)
+        
+        result = self._parse_ai_response(response, request.task_type)
+        if result:
+            await self.cache_manager.set(cache_key, result, ttl=_AI_RESPONSE_CACHE_TTL)
+        return result
+
+    async def analyze_with_ai_batch(
+        self,
+        payloads: List[Dict[str, Any]],
+        analysis_type: TaskType,
+        complexity: TaskComplexity = TaskComplexity.MEDIUM,
+        max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several payloads with AI, returning results in payload order.
+        
+        At most ``max_concurrency`` orchestrator calls run at once; empty
+        payloads are skipped and yield an empty result.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze(data: Dict[str, Any]) -> Dict[str, Any]:
+            if not data:
+                return {}
+            async with semaphore:
+                return await self.analyze_with_ai(data, analysis_type, complexity)
+        
+        return list(await asyncio.gather(*(analyze(data) for data in payloads)))
+
     async def generate_insights(
         self, 
         user_id: int, 
@@ -310,17 +577,14 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
             # Get user transactions
             transactions = await self._get_user_transactions(user_id, time_range)
             
-            # Analyze spending patterns
-            spending_analysis = await self._analyze_spending_patterns(transactions)
-            
-            # Analyze temporal patterns
-            temporal_analysis = await self._analyze_temporal_patterns(transactions)
-            
-            # Analyze geographic patterns
-            geographic_analysis = await self._analyze_geographic_patterns(transactions)
-            
-            # Generate AI insights
-            ai_insights = await self.generate_insights(user_id, "behavioral", time_range)
+            # Pattern analyzers are independent of each other and of the AI insights,
+            # and do not touch the session, so they run alongside the insight request
+            spending_analysis, temporal_analysis, geographic_analysis, ai_insights = await asyncio.gather(
+                self._analyze_spending_patterns(transactions),
+                self._analyze_temporal_patterns(transactions),
+                self._analyze_geographic_patterns(transactions),
+                self.generate_insights(user_id, "behavioral", time_range)
+            )
             
             analytics_result = {
                 "user_id": user_id,
@@ -432,10 +696,34 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         
         return result.rowcount
 
+    @asynccontextmanager
+    async def _write_transaction(self):
+        """
+        Run a write path in a single transaction that commits on success.
+        
+        Uses ``session.begin()`` when the session is idle; if a transaction was
+        already auto-begun by an earlier read, it is committed or rolled back here.
+        """
+        if not self.db_session.in_transaction():
+            async with self.db_session.begin():
+                yield self.db_session
+            return
+        try:
+            yield self.db_session
+            await self.db_session.commit()
+        except Exception:
+            await self.db_session.rollback()
+            raise
+
     # ==================== Cache Management Methods ====================
     
-    async def _invalidate_related_caches(self) -> None:
-        """Invalidate related caches when data changes."""
+    async def _invalidate_related_caches(self, db_obj: Optional[ModelType] = None) -> None:
+        """
+        Invalidate related caches when data changes.
+        
+        ``db_obj`` is the record that was created, updated or deleted, if only
+        one was; subclasses can use it to invalidate more precisely.
+        """
         # This is a simple implementation - can be enhanced based on specific needs
         cache_patterns = [
             f"{self.model.__name__.lower()}:*",
@@ -467,7 +755,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         return f"""
         Analyze the following customer transaction data for behavioral patterns:
         
-        Data: {json.dumps(data, indent=2)}
+        Data: {_dumps_payload(data)}
         
         Please provide:
         1. Spending pattern analysis
@@ -489,7 +777,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         return f"""
         Assess the risk level for the following customer data:
         
-        Data: {json.dumps(data, indent=2)}
+        Data: {_dumps_payload(data)}
         
         Please provide:
         1. Overall risk score (0-1)
@@ -511,7 +799,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         return f"""
         Generate personalized financial recommendations based on:
         
-        Data: {json.dumps(data, indent=2)}
+        Data: {_dumps_payload(data)}
         
         Please provide:
         1. Product recommendations
@@ -533,7 +821,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         return f"""
         Analyze the following data and provide insights:
         
-        Data: {json.dumps(data, indent=2)}
+        Data: {_dumps_payload(data)}
         
         Please provide a comprehensive analysis with actionable insights.
         """
@@ -543,7 +831,7 @@ class AIEnhancedRepository(ABC, Generic[ModelType, CreateSchemaType, UpdateSchem
         return f"""
         Detect anomalies in the following transaction data with threshold {threshold}:
         
-        Data: {json.dumps(data, indent=2)}
+        Data: {_dumps_payload(data)}
         
         Please identify:
         1. Unusual spending patterns
@@ -3,9 +3,12 @@ Enhanced behavioral pattern repository with AI integration for customer behavior
 """
 from __future__ import annotations
 
+import calendar
+import json
 import logging
+from collections import Counter
 from datetime import datetime, timedelta, date
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 from sqlalchemy import and_, select, func, text, desc
@@ -20,6 +23,23 @@ from app.core.llm_orchestrator import TaskType, TaskComplexity
 
 logger = logging.getLogger(__name__)
 
+# Day/month name lookup tables, indexed by weekday() and month, so the
+# temporal aggregation avoids a strftime() call per transaction.
+_DAY_NAMES = tuple(calendar.day_name)
+_MONTH_NAMES = tuple(calendar.month_name)
+
+# (risk factor, weight) rules applied by _perform_risk_analysis, in flag order
+_RISK_RULES = (
+    ("Risk behavior patterns detected", 0.4),
+    ("Low confidence in behavioral patterns", 0.2),
+    ("Complex behavioral patterns", 0.1),
+)
+
+
+def _no_data_result() -> Dict[str, Any]:
+    """Result returned instead of calling the AI when there is nothing to analyze."""
+    return {"patterns": {}, "insights": [], "recommendations": [], "skipped": "no_data"}
+
 
 class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern, BehavioralPatternCreate, BehavioralPatternUpdate]):
     """
@@ -34,23 +54,66 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
     - Pattern-based recommendations
     """
 
+    def __init__(
+        self,
+        db_session,
+        llm_orchestrator=None,
+        cache_manager=None
+    ):
+        super().__init__(BehavioralPattern, db_session, llm_orchestrator, cache_manager)
+        # Per-request memo of user data fetches keyed by (kind, user_id, time_range)
+        self._request_data_cache: Dict[Tuple[str, int, str], Any] = {}
+
     async def get_patterns_by_user(
         self,
         user_id: int,
         *,
         pattern_type: Optional[BehavioralPatternType] = None,
         include_expired: bool = False,
-        use_cache: bool = True
+        limit: Optional[int] = None,
+        order: bool = True
     ) -> List[BehavioralPattern]:
-        """Get behavioral patterns for a specific user with optional filtering."""
-        cache_key = f"user_behavioral_patterns:{user_id}:{pattern_type}:{include_expired}"
+        """
+        Get behavioral patterns for a specific user with optional filtering.
+
+        ORM instances are bound to this session and are not cached; use
+        ``get_patterns_as_dicts`` for cached, read-only access. Existence
+        checks should pass ``limit=1, order=False`` so no sort is needed.
+        """
+        query = select(BehavioralPattern).where(BehavioralPattern.user_id == user_id)
+
+        if pattern_type:
+            query = query.where(BehavioralPattern.pattern_type == pattern_type)
+
+        if not include_expired:
+            query = query.where(BehavioralPattern.next_analysis_date >= date.today())
+
+        if order:
+            query = query.order_by(desc(BehavioralPattern.confidence_score))
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.db_session.execute(query)
+        return result.scalars().all()
+
+    async def get_patterns_as_dicts(
+        self,
+        user_id: int,
+        *,
+        pattern_type: Optional[BehavioralPatternType] = None,
+        include_expired: bool = False,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Get behavioral patterns for a user as plain dictionaries, skipping ORM hydration."""
+        cache_key = f"user_behavioral_pattern_dicts:{user_id}:{pattern_type}:{include_expired}"
         
         if use_cache:
             cached = await self.cache_manager.get(cache_key)
             if cached:
-                return cached
+                return json.loads(cached)
 
-        query = select(BehavioralPattern).where(BehavioralPattern.user_id == user_id)
+        query = select(*BehavioralPattern.__table__.c).where(BehavioralPattern.user_id == user_id)
 
         if pattern_type:
             query = query.where(BehavioralPattern.pattern_type == pattern_type)
@@ -61,10 +124,11 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         query = query.order_by(desc(BehavioralPattern.confidence_score))
 
         result = await self.db_session.execute(query)
-        patterns = result.scalars().all()
+        patterns = [BehavioralPattern.row_to_dict(row) for row in result.mappings()]
 
         if use_cache:
-            await self.cache_manager.set(cache_key, patterns, ttl=3600)  # 1 hour
+            # Cache the compact JSON encoding so hits never share mutable state
+            await self.cache_manager.set(cache_key, json.dumps(patterns, separators=(",", ":")), ttl=3600)  # 1 hour
 
         return patterns
 
@@ -80,14 +144,17 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             transaction_data = await self._get_user_transaction_data(user_id, time_range)
 
             # Get existing patterns
-            existing_patterns = await self.get_patterns_by_user(user_id, include_expired=True)
+            existing_patterns = await self.get_patterns_as_dicts(user_id, include_expired=True)
+
+            if not transaction_data and not existing_patterns:
+                return _no_data_result()
 
             # Analyze patterns with AI
             pattern_data = {
                 "user_id": user_id,
                 "time_range": time_range,
                 "transactions": transaction_data,
-                "existing_patterns": [pattern.to_dict() for pattern in existing_patterns],
+                "existing_patterns": existing_patterns,
                 "pattern_types": pattern_types
             }
 
@@ -117,6 +184,9 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             # Get user's transaction data
             transaction_data = await self._get_user_transaction_data(user_id, time_range)
 
+            if not transaction_data:
+                return _no_data_result()
+
             # Analyze spending patterns with AI
             spending_analysis = await self.analyze_with_ai(
                 {"transactions": transaction_data, "user_id": user_id, "time_range": time_range},
@@ -142,8 +212,10 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
 
             # Check if pattern already exists
             existing_patterns = await self.get_patterns_by_user(
-                user_id, 
-                pattern_type=BehavioralPatternType.SPENDING_HABIT
+                user_id,
+                pattern_type=BehavioralPatternType.SPENDING_HABIT,
+                limit=1,
+                order=False
             )
 
             if existing_patterns:
@@ -169,7 +241,10 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         try:
             # Get user's transaction and activity data
             transaction_data = await self._get_user_transaction_data(user_id, time_range)
-            risk_data = await self._get_user_risk_data(user_id, time_range)
+            if not transaction_data:
+                return _no_data_result()
+
+            risk_data = await self._get_user_activity_risk_data(user_id, time_range)
 
             # Analyze risk patterns with AI
             risk_analysis = await self.analyze_with_ai(
@@ -200,8 +275,10 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
 
             # Check if pattern already exists
             existing_patterns = await self.get_patterns_by_user(
-                user_id, 
-                pattern_type=BehavioralPatternType.RISK_BEHAVIOR
+                user_id,
+                pattern_type=BehavioralPatternType.RISK_BEHAVIOR,
+                limit=1,
+                order=False
             )
 
             if existing_patterns:
@@ -228,6 +305,9 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             # Get user's transaction data for a longer period
             transaction_data = await self._get_user_transaction_data(user_id, time_range)
 
+            if not transaction_data:
+                return _no_data_result()
+
             # Analyze seasonal patterns with AI
             seasonal_analysis = await self.analyze_with_ai(
                 {
@@ -256,8 +336,10 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
 
             # Check if pattern already exists
             existing_patterns = await self.get_patterns_by_user(
-                user_id, 
-                pattern_type=BehavioralPatternType.TRANSACTION_TIMING
+                user_id,
+                pattern_type=BehavioralPatternType.TRANSACTION_TIMING,
+                limit=1,
+                order=False
             )
 
             if existing_patterns:
@@ -283,6 +365,9 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         try:
             # Get user's transaction and decision data
             transaction_data = await self._get_user_transaction_data(user_id, time_range)
+            if not transaction_data:
+                return _no_data_result()
+
             decision_data = await self._get_user_decision_data(user_id, time_range)
 
             # Analyze behavioral biases with AI
@@ -312,14 +397,14 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         """Get AI-generated insights from behavioral patterns."""
         try:
             # Get user's patterns
-            patterns = await self.get_patterns_by_user(user_id, pattern_type=pattern_type)
+            patterns = await self.get_patterns_as_dicts(user_id, pattern_type=pattern_type)
 
             if not patterns:
                 return {"insights": [], "recommendations": [], "error": "No patterns found"}
 
             # Analyze patterns for insights
             pattern_data = {
-                "patterns": [pattern.to_dict() for pattern in patterns],
+                "patterns": patterns,
                 "user_id": user_id,
                 "pattern_type": pattern_type
             }
@@ -346,21 +431,52 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             # Get patterns for the time range
             start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
             
-            query = select(BehavioralPattern).where(BehavioralPattern.created_at >= start_date)
+            conditions = [BehavioralPattern.created_at >= start_date]
             
             if pattern_type:
-                query = query.where(BehavioralPattern.pattern_type == pattern_type)
-
-            result = await self.db_session.execute(query)
-            patterns = result.scalars().all()
+                conditions.append(BehavioralPattern.pattern_type == pattern_type)
+
+            # Stream the narrow aggregate columns so memory stays O(batch) for large windows
+            stats_query = select(
+                BehavioralPattern.pattern_type,
+                BehavioralPattern.confidence_score
+            ).where(and_(*conditions)).execution_options(yield_per=1000)
+
+            total_patterns = 0
+            confidence_sum = 0.0
+            confidence_count = 0
+            type_distribution = Counter()
+
+            stream = await self.db_session.stream(stats_query)
+            async for partition in stream.partitions():
+                total_patterns += len(partition)
+                type_distribution.update(await self._calculate_type_distribution(partition))
+                for row in partition:
+                    if row.confidence_score is not None:
+                        confidence_sum += row.confidence_score
+                        confidence_count += 1
+
+            if not total_patterns:
+                return _no_data_result()
+
+            # Only the most recent patterns are sent to the AI as a sample
+            sample_query = (
+                select(*BehavioralPattern.__table__.c)
+                .where(and_(*conditions))
+                .order_by(desc(BehavioralPattern.created_at))
+                .limit(500)
+            )
+            result = await self.db_session.execute(sample_query)
+            patterns = [BehavioralPattern.row_to_dict(row) for row in result.mappings()]
 
             # Analyze trends with AI
             trend_data = {
-                "patterns": [pattern.to_dict() for pattern in patterns],
+                "patterns": patterns,
                 "time_range": time_range,
                 "pattern_type": pattern_type,
-                "total_patterns": len(patterns),
-                "type_distribution": await self._calculate_type_distribution(patterns)
+                "total_patterns": total_patterns,
+                "average_confidence_score": confidence_sum / confidence_count if confidence_count else 0.0,
+                "type_distribution": dict(type_distribution)
             }
 
             trend_analysis = await self.analyze_with_ai(
@@ -386,6 +502,8 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             updated_count = 0
 
             for user_id in user_ids:
+                # Scope the per-request data memo to a single user
+                self._request_data_cache.clear()
                 try:
                     if pattern_type == BehavioralPatternType.SPENDING_HABIT:
                         await self.detect_spending_patterns(user_id, time_range)
@@ -443,19 +561,27 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         """Get user data for behavioral analysis."""
         try:
             # Get user's behavioral patterns
-            patterns = await self.get_patterns_by_user(user_id, include_expired=True)
+            patterns = await self.get_patterns_as_dicts(user_id, include_expired=True)
             
             # Get user's transaction data
             transaction_data = await self._get_user_transaction_data(user_id, time_range or "90d")
 
+            # Order-preserving dedupe of pattern types with one lookup per row
+            seen_types = {}
+            for pattern in patterns:
+                pattern_type = pattern["pattern_type"]
+                if pattern_type is not None:
+                    seen_types[pattern_type] = None
+            pattern_types = list(seen_types)
+
             return {
                 "user_id": user_id,
                 "data_type": data_type,
                 "time_range": time_range,
-                "behavioral_patterns": [pattern.to_dict() for pattern in patterns],
+                "behavioral_patterns": patterns,
                 "transactions": transaction_data,
                 "total_patterns": len(patterns),
-                "pattern_types": list(set([p.pattern_type.value for p in patterns if p.pattern_type]))
+                "pattern_types": pattern_types
             }
 
         except Exception as e:
@@ -486,24 +612,41 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             logger.error(f"Failed to get user transactions: {str(e)}")
             return []
 
-    async def _get_user_risk_data(
+    async def _get_user_transaction_data(
         self,
         user_id: int,
         time_range: str
+    ) -> List[Dict[str, Any]]:
+        """Get user's transaction data, memoized for the lifetime of this repository."""
+        key = ("transactions", user_id, time_range)
+        if key not in self._request_data_cache:
+            self._request_data_cache[key] = await self._get_user_transactions(user_id, time_range)
+        return self._request_data_cache[key]
+
+    async def _get_user_activity_risk_data(
+        self,
+        user_id: int,
+        time_range: str = "90d"
     ) -> Dict[str, Any]:
-        """Get user's risk data for behavioral analysis."""
+        """Get user's activity risk data (alerts, suspicious activity) for risk pattern detection."""
+        key = ("risk", user_id, time_range)
+        if key in self._request_data_cache:
+            return self._request_data_cache[key]
+
         try:
             # This would typically query risk-related data
             # For now, return mock data
-            return {
+            risk_data = {
                 "risk_score": 0.3,
                 "risk_factors": ["high_transaction_frequency", "multiple_locations"],
                 "fraud_alerts": 2,
                 "suspicious_activities": 1
             }
+            self._request_data_cache[key] = risk_data
+            return risk_data
 
         except Exception as e:
-            logger.error(f"Failed to get user risk data: {str(e)}")
+            logger.error(f"Failed to get user activity risk data: {str(e)}")
             return {"error": str(e)}
 
     async def _get_user_decision_data(
@@ -512,10 +655,14 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
         time_range: str
     ) -> List[Dict[str, Any]]:
         """Get user's decision data for behavioral bias analysis."""
+        key = ("decisions", user_id, time_range)
+        if key in self._request_data_cache:
+            return self._request_data_cache[key]
+
         try:
             # This would typically query decision-related data
             # For now, return mock data
-            return [
+            decision_data = [
                 {
                     "decision_type": "product_selection",
                     "choice": "premium_card",
@@ -523,25 +670,38 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
                     "context": "card_upgrade_offer"
                 }
             ]
+            self._request_data_cache[key] = decision_data
+            return decision_data
 
         except Exception as e:
             logger.error(f"Failed to get user decision data: {str(e)}")
             return []
 
     async def _get_user_risk_data(self, user_id: int) -> Dict[str, Any]:
-        """Get user's behavioral risk data."""
+        """Get user's behavioral risk metrics aggregated from stored patterns."""
         try:
             # Get user's behavioral patterns
-            patterns = await self.get_patterns_by_user(user_id, include_expired=True)
+            patterns = await self.get_patterns_as_dicts(user_id, include_expired=True)
             
-            # Calculate risk metrics
-            total_patterns = len(patterns)
-            risk_patterns = len([p for p in patterns if p.pattern_type == BehavioralPatternType.RISK_BEHAVIOR])
-            high_confidence_patterns = len([p for p in patterns if p.confidence_score >= 0.8])
+            # Calculate risk metrics in a single pass over the patterns
+            total_patterns = 0
+            risk_patterns = 0
+            high_confidence_patterns = 0
+            confidence_sum = 0.0
+            confidence_count = 0
 
-            # Calculate average confidence score
-            confidence_scores = [p.confidence_score for p in patterns if p.confidence_score is not None]
-            avg_confidence_score = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+            for pattern in patterns:
+                total_patterns += 1
+                if pattern["pattern_type"] == BehavioralPatternType.RISK_BEHAVIOR.value:
+                    risk_patterns += 1
+                confidence_score = pattern["ai_analysis"]["confidence_score"]
+                if confidence_score is not None:
+                    confidence_sum += confidence_score
+                    confidence_count += 1
+                    if confidence_score >= 0.8:
+                        high_confidence_patterns += 1
+
+            avg_confidence_score = confidence_sum / confidence_count if confidence_count else 0.0
 
             return {
                 "user_id": user_id,
@@ -549,7 +709,7 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
                 "risk_patterns": risk_patterns,
                 "high_confidence_patterns": high_confidence_patterns,
                 "average_confidence_score": avg_confidence_score,
-                "patterns": [pattern.to_dict() for pattern in patterns]
+                "patterns": patterns
             }
 
         except Exception as e:
@@ -565,24 +725,20 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
             if not transactions:
                 return {"patterns": [], "insights": [], "recommendations": []}
 
-            # Calculate basic metrics
-            total_amount = sum(t.get("amount", 0) for t in transactions)
+            # Calculate basic metrics and group by category and time in one pass
+            total_amount = 0
             transaction_count = len(transactions)
-            
-            # Group by category and time
             category_patterns = {}
-            temporal_patterns = {}
+            temporal_patterns = Counter(
+                t["timestamp"].hour for t in transactions if t.get("timestamp")
+            )
             
             for transaction in transactions:
                 category = transaction.get("category", "unknown")
                 amount = transaction.get("amount", 0)
-                timestamp = transaction.get("timestamp")
                 
+                total_amount += amount
                 category_patterns[category] = category_patterns.get(category, 0) + amount
-                
-                if timestamp:
-                    hour = timestamp.hour
-                    temporal_patterns[hour] = temporal_patterns.get(hour, 0) + 1
 
             # Find behavioral insights
             insights = []
@@ -592,7 +748,7 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
                 insights.append("Concentrated spending in few categories")
             
             # Check for temporal patterns
-            peak_hours = sorted(temporal_patterns.items(), key=lambda x: x[1], reverse=True)[:3]
+            peak_hours = temporal_patterns.most_common(3)
             if peak_hours:
                 insights.append(f"Peak spending hours: {peak_hours}")
 
@@ -601,7 +757,7 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
                     "total_amount": total_amount,
                     "transaction_count": transaction_count,
                     "category_patterns": category_patterns,
-                    "temporal_patterns": temporal_patterns
+                    "temporal_patterns": dict(temporal_patterns)
                 },
                 "insights": insights,
                 "recommendations": [
@@ -632,8 +788,8 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
                 timestamp = transaction.get("timestamp")
                 if timestamp:
                     hour = timestamp.hour
-                    day = timestamp.strftime("%A")
-                    month = timestamp.strftime("%B")
+                    day = _DAY_NAMES[timestamp.weekday()]
+                    month = _MONTH_NAMES[timestamp.month]
                     
                     hourly_patterns[hour] = hourly_patterns.get(hour, 0) + 1
                     daily_patterns[day] = daily_patterns.get(day, 0) + 1
@@ -716,31 +872,32 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
     ) -> Dict[str, Any]:
         """Perform risk analysis for behavioral data."""
         try:
-            patterns = user_data.get("behavioral_patterns", [])
-            
-            # Calculate risk metrics
-            total_patterns = len(patterns)
-            risk_patterns = len([p for p in patterns if p.get("pattern_type") == "risk_behavior"])
-            high_confidence_patterns = len([p for p in patterns if p.get("confidence_score", 0) >= 0.8])
-
-            # Calculate risk score
-            risk_score = 0.0
-            risk_factors = []
-
-            if risk_patterns > 0:
-                risk_score += 0.4
-                risk_factors.append("Risk behavior patterns detected")
-
-            if high_confidence_patterns < total_patterns * 0.5:
-                risk_score += 0.2
-                risk_factors.append("Low confidence in behavioral patterns")
-
-            if total_patterns > 10:
-                risk_score += 0.1
-                risk_factors.append("Complex behavioral patterns")
+            # Metrics were aggregated by _get_user_risk_data in its single pass
+            total_patterns = user_data.get("total_patterns", 0)
+            risk_patterns = user_data.get("risk_patterns", 0)
+            high_confidence_patterns = user_data.get("high_confidence_patterns", 0)
+
+            # Without patterns there is nothing to infer risk from
+            if total_patterns == 0:
+                return {
+                    "overall_risk_score": 0.0,
+                    "risk_factors": [],
+                    "behavioral_metrics": {
+                        "total_patterns": 0,
+                        "risk_patterns": 0,
+                        "high_confidence_patterns": 0
+                    }
+                }
 
-            # Normalize risk score
-            risk_score = min(risk_score, 1.0)
+            # Calculate risk score from the rule flags
+            low_confidence = high_confidence_patterns * 2 < total_patterns
+            flags = (
+                risk_patterns > 0,
+                low_confidence,
+                total_patterns > 10
+            )
+            risk_score = min(sum(weight * flag for flag, (_, weight) in zip(flags, _RISK_RULES)), 1.0)
+            risk_factors = [factor for flag, (factor, _) in zip(flags, _RISK_RULES) if flag]
 
             return {
                 "overall_risk_score": risk_score,
@@ -760,18 +917,10 @@ class EnhancedBehavioralPatternRepository(AIEnhancedRepository[BehavioralPattern
 
     async def _calculate_type_distribution(
         self,
-        patterns: List[BehavioralPattern]
+        patterns: List[Any]
     ) -> Dict[str, int]:
         """Calculate pattern type distribution."""
-        try:
-            distribution = {}
-
-            for pattern in patterns:
-                pattern_type = pattern.pattern_type.value if pattern.pattern_type else "unknown"
-                distribution[pattern_type] = distribution.get(pattern_type, 0) + 1
-
-            return distribution
-
-        except Exception as e:
-            logger.error(f"Failed to calculate type distribution: {str(e)}")
-            return {} 
\ No newline at end of file
+        return dict(Counter(
+            pattern.pattern_type.value if pattern.pattern_type else "unknown"
+            for pattern in patterns
+        )) 
\ No newline at end of file
@@ -1,23 +1,126 @@
 """
 Enhanced branch repository with AI integration for branch analytics and management.
+
+Relationship loading:
+- Branch-only lookups raise-load every relationship, so an accidental
+  traversal fails instead of issuing one lazy load per row.
+- ``accounts`` and ``employees`` are only eager-loaded on request, always with
+  ``selectinload``. A ``joinedload`` of both would multiply the branch row by
+  accounts x employees; ``selectinload`` issues one IN query per relationship
+  (batched by SQLAlchemy in chunks of 500 keys) and never duplicates rows.
+- Analytics paths avoid relationships entirely and read column dictionaries or
+  database aggregates instead.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
 
-from sqlalchemy import and_, select, func, text, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, or_, select, func, text, desc, lambda_stmt, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import raiseload, selectinload
 
 from app.models.branch import Branch, BranchType, BranchStatus, Employee, EmployeeRole
 from app.schemas.branch import BranchCreate, BranchUpdate
-from app.repositories.enhanced_base import AIEnhancedRepository
+from app.repositories.enhanced_base import (
+    AIEnhancedRepository,
+    async_memoize,
+    _AI_RESPONSE_CACHE_TTL,
+    _ai_response_cache_key,
+    _cache_key_part,
+    _dumps_payload
+)
 from app.core.llm_orchestrator import TaskType, TaskComplexity
 
 logger = logging.getLogger(__name__)
 
+# Shared immutable result for stub row fetches that have no data
+_NO_ROWS: Sequence[Dict[str, Any]] = ()
+
+# Combined performance analyses: branches per request, output tokens budgeted
+# per branch with a hard cap per request, and the per-request timeout in seconds
+_PERFORMANCE_BATCH_SIZE = 10
+_PERFORMANCE_TOKENS_PER_BRANCH = 1000
+_PERFORMANCE_MAX_OUTPUT_TOKENS = 8000
+_PERFORMANCE_BATCH_TIMEOUT = 60.0
+
+# Relationships get_by_branch_code may eager-load on request
+_LOADABLE_BRANCH_RELATIONSHIPS = frozenset(("accounts", "employees"))
+
+# [epoch second, ISO string] for the most recent _iso_now_second() call
+_timestamp_cache: List[Any] = [0, ""]
+
+
+def _iso_now_second() -> str:
+    """Return the current UTC time as an ISO string, truncated and cached per second."""
+    now = int(time.time())
+    if _timestamp_cache[0] != now:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.utcfromtimestamp(now).isoformat()
+    return _timestamp_cache[1]
+
+# Version counters for cached branch reads. Writes bump a counter instead of
+# deleting keys, so every entry cached under the old version becomes unreachable.
+# Lookups by code or location can match any branch and share one counter.
+_BRANCH_LOOKUP_VERSION_KEY = "branches:ver"
+
+
+def _branch_lookup_version_key(*args: Any, **kwargs: Any) -> str:
+    return _BRANCH_LOOKUP_VERSION_KEY
+
+
+def _branch_version_key(branch_id: int, *args: Any, **kwargs: Any) -> str:
+    return f"branch:{branch_id}:ver"
+
+
+def _branch_code_cache_key(
+    branch_code: str,
+    include_inactive: bool = False,
+    load: Tuple[str, ...] = ()
+) -> str:
+    # The load set is part of the key so an under-loaded entry is never served
+    return f"branch_code:{_cache_key_part(branch_code)}:{include_inactive}:{','.join(sorted(load))}"
+
+
+def _location_cache_key(
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    country: Optional[str] = None,
+    branch_type: Optional[BranchType] = None,
+    limit: int = 100,
+    cursor: Optional[Tuple[str, int]] = None
+) -> str:
+    # Falsy filters are not applied by the query, so they share one key part
+    return ":".join((
+        "branches_location",
+        _cache_key_part(city),
+        _cache_key_part(state),
+        _cache_key_part(country),
+        _cache_key_part(branch_type, "all"),
+        str(limit),
+        f"{_cache_key_part(cursor[0])},{cursor[1]}" if cursor else ""
+    ))
+
+
+def _employee_count_cache_key(
+    branch_id: int,
+    role: Optional[EmployeeRole] = None,
+    active_only: bool = True
+) -> str:
+    return f"branch_employee_count:{branch_id}:{_cache_key_part(role, 'all')}:{active_only}"
+
+
+def _employee_breakdown_cache_key(branch_id: int) -> str:
+    return f"branch_employee_breakdown:{branch_id}"
+
+
+def _branch_analytics_cache_key(branch_id: int, time_range: str = "30d") -> str:
+    return f"branch_analytics:{branch_id}:{time_range}"
+
 
 class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, BranchUpdate]):
     """
@@ -42,77 +145,198 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
 
     # ==================== Enhanced CRUD Operations ====================
 
+    @async_memoize(ttl=1800, key_fn=_branch_code_cache_key, version_key_fn=_branch_lookup_version_key)  # 30 minutes
     async def get_by_branch_code(
         self,
         branch_code: str,
         include_inactive: bool = False,
-        load_relationships: bool = True,
-        use_cache: bool = True
-    ) -> Optional[Branch]:
-        """Get a branch by branch code with caching."""
-        cache_key = f"branch_code:{branch_code}"
+        load: Tuple[str, ...] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a branch by branch code with caching.
 
-        if use_cache:
-            cached = await self.cache_manager.get(cache_key)
-            if cached:
-                return cached
+        Returns the branch as a dictionary so the cached value is not bound to a
+        session. Only the relationships named in ``load`` (``"accounts"`` and/or
+        ``"employees"``) are loaded and included under the same keys.
+        """
+        unknown = set(load) - _LOADABLE_BRANCH_RELATIONSHIPS
+        if unknown:
+            raise ValueError(f"Cannot load branch relationships: {', '.join(sorted(unknown))}")
 
-        query = select(Branch).where(Branch.branch_code == branch_code)
+        query = select(Branch).where(Branch.branch_code == branch_code).limit(1)
 
         if not include_inactive:
             query = query.where(Branch.status == BranchStatus.ACTIVE)
 
-        if load_relationships:
-            query = query.options(
-                selectinload(Branch.accounts),
-                selectinload(Branch.employees)
-            )
+        # Any relationship not loaded explicitly raises instead of lazy-loading per row
+        options = [raiseload("*")]
+        if "accounts" in load:
+            options.append(selectinload(Branch.accounts))
+        if "employees" in load:
+            options.append(selectinload(Branch.employees))
+        query = query.options(*options)
 
         result = await self.db_session.execute(query)
         branch = result.scalars().first()
+        if not branch:
+            return None
 
-        if branch and use_cache:
-            await self.cache_manager.set(cache_key, branch, ttl=1800)  # 30 minutes
+        branch_data = branch.to_dict()
+        if "accounts" in load:
+            branch_data["accounts"] = [account.to_dict() for account in branch.accounts]
+        if "employees" in load:
+            branch_data["employees"] = [employee.to_dict() for employee in branch.employees]
 
-        return branch
+        return branch_data
 
+    @async_memoize(ttl=1800, key_fn=_location_cache_key, version_key_fn=_branch_lookup_version_key)  # 30 minutes
     async def get_branches_by_location(
         self,
         city: Optional[str] = None,
         state: Optional[str] = None,
         country: Optional[str] = None,
         branch_type: Optional[BranchType] = None,
-        use_cache: bool = True
-    ) -> List[Branch]:
-        """Get branches by location with filtering."""
-        cache_key = f"branches_location:{city}:{state}:{country}:{branch_type.value if branch_type else 'all'}"
-
-        if use_cache:
-            cached = await self.cache_manager.get(cache_key)
-            if cached:
-                return cached
-
-        query = select(Branch)
+        limit: int = 100,
+        cursor: Optional[Tuple[str, int]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        Get a page of branches by location with filtering, as column dictionaries.
+
+        Pages are ordered by ``(state, id)``. Pass the returned cursor back in to
+        fetch the next page; it is ``None`` once the last page has been read.
+        """
+        # Lambda statements let SQLAlchemy cache the compiled SQL per filter combination;
+        # always filter for active branches
+        query = lambda_stmt(lambda: select(*Branch.__table__.c).where(Branch.status == BranchStatus.ACTIVE))
 
         if city:
-            query = query.where(Branch.city == city)
+            query += lambda s: s.where(Branch.city == city)
         if state:
-            query = query.where(Branch.state == state)
+            query += lambda s: s.where(Branch.state == state)
         if country:
-            query = query.where(Branch.country == country)
+            query += lambda s: s.where(Branch.country == country)
         if branch_type:
-            query = query.where(Branch.branch_type == branch_type)
+            query += lambda s: s.where(Branch.branch_type == branch_type)
+        if cursor:
+            # Expanded keyset predicate; row-value comparison is not portable to SQL Server
+            after_state, after_id = cursor
+            query += lambda s: s.where(
+                or_(
+                    Branch.state > after_state,
+                    and_(Branch.state == after_state, Branch.id > after_id)
+                )
+            )
+
+        query += lambda s: s.order_by(Branch.state, Branch.id)
+        query = query.add_criteria(lambda s: s.limit(limit), track_on=[limit])
+
+        result = await self.db_session.execute(query)
+        branches = [dict(row) for row in result.mappings()]
+
+        next_cursor = None
+        if len(branches) == limit:
+            next_cursor = (branches[-1]["state"], branches[-1]["id"])
 
-        # Always filter for active branches
-        query = query.where(Branch.status == BranchStatus.ACTIVE)
+        return branches, next_cursor
+
+    async def get_branches_by_locations(
+        self,
+        locations: Sequence[Tuple[str, str, str]],
+        limit: int = 100
+    ) -> Dict[Tuple[str, str, str], Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]]:
+        """
+        Get the first page of active branches for several (city, state, country) locations.
+
+        Each entry matches what ``get_branches_by_location(city, state, country, limit=limit)``
+        returns and shares its cache entry. Locations that miss the cache are read
+        with a single query instead of one query per location.
+        """
+        keys = list(dict.fromkeys(locations))
+        version = await self.cache_manager.get(_BRANCH_LOOKUP_VERSION_KEY) or 0
+        cache_keys = [
+            f"{_location_cache_key(city, state, country, None, limit)}:v{version}"
+            for city, state, country in keys
+        ]
+        cached = await self.cache_manager.mget(cache_keys)
+
+        pages = {key: page for key, page in zip(keys, cached) if page}
+        missing = [key for key in keys if key not in pages]
+        if not missing:
+            return pages
+
+        # OR of equality conjunctions instead of a row-value IN, which SQL Server lacks
+        query = (
+            select(*Branch.__table__.c)
+            .where(
+                Branch.status == BranchStatus.ACTIVE,
+                or_(*(
+                    and_(Branch.city == city, Branch.state == state, Branch.country == country)
+                    for city, state, country in missing
+                ))
+            )
+            .order_by(Branch.state, Branch.id)
+        )
+        result = await self.db_session.execute(query)
 
+        grouped: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {key: [] for key in missing}
+        for row in result.mappings():
+            # Case-insensitive collations can return rows whose key was not requested verbatim
+            group = grouped.get((row["city"], row["state"], row["country"]))
+            if group is not None:
+                group.append(dict(row))
+
+        fetched = {}
+        for key, branches in grouped.items():
+            # Trim to the same page and cursor a single-location call would produce
+            page = branches[:limit]
+            next_cursor = (page[-1]["state"], page[-1]["id"]) if len(branches) >= limit else None
+            fetched[key] = (page, next_cursor)
+
+        await self.cache_manager.mset(
+            {cache_key: fetched[key] for key, cache_key in zip(keys, cache_keys) if key in fetched},
+            ttl=1800
+        )
+
+        pages.update(fetched)
+        return pages
+
+    async def get_by_id_for_ai(
+        self,
+        branch_id: int
+    ) -> Optional[Branch]:
+        """
+        Get a branch row for building an AI payload.
+
+        All relationships are raise-loaded, so a payload builder that touches
+        ``accounts`` or ``employees`` fails fast instead of issuing lazy loads;
+        those come from the dedicated account and employee queries.
+        """
+        query = select(Branch).where(Branch.id == branch_id).options(raiseload("*"))
         result = await self.db_session.execute(query)
-        branches = result.scalars().all()
+        return result.scalar_one_or_none()
 
-        if branches and use_cache:
-            await self.cache_manager.set(cache_key, branches, ttl=1800)  # 30 minutes
+    # ==================== Cache Management ====================
 
-        return branches
+    async def invalidate_branch_caches(self, branch_id: int) -> None:
+        """
+        Invalidate cached reads for a branch after it or its employees change.
+
+        Employee writers should call this with the employee's ``branch_id``.
+        The base class's ``get_by_id`` and ``get_multi`` entries are not
+        versioned, so they are deleted.
+        """
+        await self.cache_manager.incr(_branch_version_key(branch_id))
+        await self.cache_manager.incr(_BRANCH_LOOKUP_VERSION_KEY)
+        await self.cache_manager.delete_patterns([f"branch:{branch_id}", "branch_multi:*"])
+
+    async def _invalidate_related_caches(self, db_obj: Optional[Branch] = None) -> None:
+        """Invalidate only the written branch's caches instead of clearing the cache."""
+        if db_obj is None:
+            await super()._invalidate_related_caches()
+            return
+
+        # The identity survives a delete, unlike the expired id attribute
+        await self.invalidate_branch_caches(inspect(db_obj).identity[0])
 
     # ==================== AI Integration Methods ====================
 
@@ -241,7 +465,19 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
         """Analyze employee performance using AI."""
         try:
             # Get employee data
-            employee_data = {}
+            query = lambda_stmt(
+                lambda: select(*Employee.__table__.c).where(
+                    and_(Employee.id == employee_id, Employee.branch_id == branch_id)
+                )
+            )
+            result = await self.db_session.execute(query)
+            employee_data = result.mappings().one_or_none()
+
+            # Unknown employee or not at this branch, so skip the orchestrator round trip
+            if employee_data is None:
+                return {}
+
+            employee_data = dict(employee_data)
             
             # Analyze with AI
             analysis_result = await self.analyze_with_ai(
@@ -256,6 +492,112 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
             logger.error(f"Employee performance analysis failed: {str(e)}")
             return {}
 
+    async def batch_analyze_branches(
+        self,
+        branch_ids: List[int],
+        task_type: TaskType = TaskType.RISK_ASSESSMENT,
+        complexity: TaskComplexity = TaskComplexity.HIGH,
+        data_type: str = "performance"
+    ) -> List[Dict[str, Any]]:
+        """Analyze several branches with AI, running the orchestrator calls concurrently."""
+        # Branch data is read sequentially because the session does not allow concurrent use
+        branch_data = [
+            await self._get_branch_data_for_analysis(branch_id, data_type)
+            for branch_id in branch_ids
+        ]
+
+        return await self.analyze_with_ai_batch(branch_data, task_type, complexity)
+
+    async def analyze_branches_performance(
+        self,
+        branch_ids: List[int],
+        time_range: str = "30d"
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze several branches' performance with batched AI requests.
+
+        Branches are sent in chunks of ``_PERFORMANCE_BATCH_SIZE``, one request
+        per chunk. Returns results keyed by branch ID. Branches missing from a
+        combined response, or all of a chunk's if it fails or cannot be parsed,
+        fall back to one request per branch. Each batched answer is also cached
+        under its branch's own payload, so ``analyze_branch_performance`` reuses it.
+        """
+        # Branch data is read sequentially because the session does not allow concurrent use
+        payloads = {}
+        for branch_id in dict.fromkeys(branch_ids):
+            branch_data = await self._get_branch_data_for_analysis(branch_id, "performance", time_range)
+            if branch_data:
+                payloads[branch_id] = branch_data
+
+        if not payloads:
+            return {}
+
+        results: Dict[int, Dict[str, Any]] = {}
+        batch_ids = list(payloads)
+        for start in range(0, len(batch_ids), _PERFORMANCE_BATCH_SIZE):
+            batch = {branch_id: payloads[branch_id] for branch_id in batch_ids[start:start + _PERFORMANCE_BATCH_SIZE]}
+            branches = [{"branch_id": branch_id, **data} for branch_id, data in batch.items()]
+            parsed = await self.analyze_with_ai(
+                {"branches": branches},
+                TaskType.RISK_ASSESSMENT,
+                TaskComplexity.HIGH,
+                timeout=_PERFORMANCE_BATCH_TIMEOUT,
+                max_output_tokens=min(_PERFORMANCE_TOKENS_PER_BRANCH * len(batch), _PERFORMANCE_MAX_OUTPUT_TOKENS),
+                prompt=self._create_batch_performance_prompt(branches)
+            )
+
+            # JSON may hand the IDs back as strings, so match them by string form
+            batch_keys = {str(branch_id): branch_id for branch_id in batch}
+            for item in parsed.get("branches", []) if isinstance(parsed, dict) else []:
+                branch_id = batch_keys.get(str(item.get("branch_id"))) if isinstance(item, dict) else None
+                if branch_id is None:
+                    continue
+                results[branch_id] = item
+                # Serve later single-branch analyses of the same data from this answer
+                await self.cache_manager.set(
+                    _ai_response_cache_key(payloads[branch_id], TaskType.RISK_ASSESSMENT, TaskComplexity.HIGH),
+                    item,
+                    ttl=_AI_RESPONSE_CACHE_TTL
+                )
+
+        missing = [branch_id for branch_id in payloads if branch_id not in results]
+        if missing:
+            fallback = await self.analyze_with_ai_batch(
+                [payloads[branch_id] for branch_id in missing],
+                TaskType.RISK_ASSESSMENT,
+                TaskComplexity.HIGH
+            )
+            results.update(zip(missing, fallback))
+
+        return results
+
+    def _create_batch_performance_prompt(self, branches: List[Dict[str, Any]]) -> str:
+        """Create one risk assessment prompt covering several branches, each tagged with its ``branch_id``."""
+        return f"""
+        Assess the performance risk of each of the following bank branches:
+        
+        Branches: {_dumps_payload(branches)}
+        
+        For every branch, provide:
+        1. Overall risk score (0-1)
+        2. Risk factors
+        3. Risk level (Low/Medium/High)
+        4. Mitigation recommendations
+        
+        Format the response as JSON with one entry per branch, echoing its branch_id:
+        {{
+            "branches": [
+                {{
+                    "branch_id": 0,
+                    "risk_score": 0.0,
+                    "risk_level": "Low",
+                    "risk_factors": [],
+                    "mitigation_recommendations": []
+                }}
+            ]
+        }}
+        """
+
     # ==================== Implementation of Abstract Methods ====================
 
     async def _get_user_data_for_analysis(
@@ -265,26 +607,21 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
         time_range: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get user data for AI analysis (for branch context)."""
-        try:
-            # This method is not directly applicable for branches
-            # but required by the abstract base class
-            return {
-                "data_type": data_type,
-                "time_range": time_range,
-                "branch_context": True
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to get user data for analysis: {str(e)}")
-            return {}
+        # This method is not directly applicable for branches
+        # but required by the abstract base class
+        return {
+            "data_type": data_type,
+            "time_range": time_range,
+            "branch_context": True
+        }
 
     async def _get_user_transactions(
         self,
         user_id: int,
         time_range: str
-    ) -> List[Dict[str, Any]]:
+    ) -> Sequence[Dict[str, Any]]:
         """Get user transactions for analysis (not applicable for branches)."""
-        return []
+        return _NO_ROWS
 
     async def _get_user_risk_data(self, user_id: int) -> Dict[str, Any]:
         """Get user data for risk assessment (not applicable for branches)."""
@@ -330,7 +667,7 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
         """Get branch data for AI analysis."""
         try:
             # Get branch
-            branch = await self.get_by_id(branch_id)
+            branch = await self.get_by_id_for_ai(branch_id)
             if not branch:
                 logger.error(f"Branch {branch_id} not found")
                 return {}
@@ -338,13 +675,13 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
             # Get branch accounts
             accounts = await self._get_branch_accounts(branch_id, time_range or "30d")
 
-            # Get branch employees
-            employees = await self._get_branch_employees(branch_id)
+            # Get branch employees as column dictionaries
+            employees = await self._get_branch_employee_dicts(branch_id)
 
             return {
                 "branch_profile": branch.to_dict(),
                 "accounts": accounts,
-                "employees": [employee.to_dict() for employee in employees],
+                "employees": employees,
                 "data_type": data_type,
                 "time_range": time_range
             }
@@ -357,109 +694,136 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
         self,
         branch_id: int,
         time_range: str
-    ) -> List[Dict[str, Any]]:
+    ) -> Sequence[Dict[str, Any]]:
         """Get branch accounts for analysis."""
-        try:
-            # This would typically query accounts associated with the branch
-            # For now, return empty list as account-branch relationship needs to be implemented
-            return []
+        # This would typically query accounts associated with the branch
+        # For now, return no rows as account-branch relationship needs to be implemented
+        return _NO_ROWS
 
-        except Exception as e:
-            logger.error(f"Failed to get branch accounts: {str(e)}")
-            return []
+    async def _fetch_branch_metric_counts(
+        self,
+        branch_id: int
+    ) -> Dict[str, Any]:
+        """Count branch accounts and employees in the database."""
+        # Accounts are not linked to branches yet, so only employees are counted
+        employee_counts = await self._employee_counts(branch_id)
+
+        return {
+            "accounts": 0,
+            "employees": employee_counts
+        }
 
-    async def _get_branch_employees(
+    @async_memoize(ttl=60, key_fn=_employee_breakdown_cache_key, version_key_fn=_branch_version_key)
+    async def _employee_counts(
         self,
         branch_id: int
-    ) -> List[Employee]:
-        """Get branch employees."""
+    ) -> Dict[str, Any]:
+        """Count a branch's employees by role and active flag with one grouped query."""
+        counts = {"total": 0, "active": 0, "role_distribution": {}}
         try:
-            return await self.get_branch_employees(branch_id)
+            query = lambda_stmt(
+                lambda: select(Employee.role, Employee.is_active, func.count(Employee.id))
+                .where(Employee.branch_id == branch_id)
+                .group_by(Employee.role, Employee.is_active)
+            )
+            result = await self.db_session.execute(query)
 
-        except Exception as e:
-            logger.error(f"Failed to get branch employees: {str(e)}")
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to count branch employees: {str(e)}")
+            return counts
+
+        role_distribution = counts["role_distribution"]
+        for role, is_active, count in result:
+            counts["total"] += count
+            if is_active:
+                counts["active"] += count
+            role_name = role.value if role else "unknown"
+            role_distribution[role_name] = role_distribution.get(role_name, 0) + count
+
+        return counts
+
+    async def _get_branch_employee_dicts(
+        self,
+        branch_id: int,
+        active_only: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Get branch employees as column dictionaries without building ORM instances."""
+        try:
+            query = lambda_stmt(lambda: select(*Employee.__table__.c).where(Employee.branch_id == branch_id))
+
+            if active_only:
+                query += lambda s: s.where(Employee.is_active == True)  # noqa: E712
+
+            result = await self.db_session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to get branch employee data: {str(e)}")
             return []
 
     async def _calculate_branch_metrics(
         self,
-        accounts: List[Dict[str, Any]],
-        employees: List[Employee],
+        account_count: int,
+        employee_counts: Dict[str, Any],
         branch: Branch
     ) -> Dict[str, Any]:
         """Calculate branch performance metrics."""
-        try:
-            # Calculate metrics
-            metrics = {
-                "total_accounts": len(accounts),
-                "total_employees": len(employees),
-                "accounts_per_employee": len(accounts) / max(len(employees), 1),
-                "branch_utilization": 0.0,  # Placeholder
-                "operational_efficiency": 0.0,  # Placeholder
-                "customer_satisfaction": 0.0,  # Placeholder
-            }
-
-            return metrics
-
-        except Exception as e:
-            logger.error(f"Failed to calculate branch metrics: {str(e)}")
-            return {}
+        # Calculate metrics
+        metrics = {
+            "total_accounts": account_count,
+            "total_employees": employee_counts["total"],
+            "active_employees": employee_counts["active"],
+            "accounts_per_employee": account_count / max(employee_counts["active"], 1),
+            "branch_utilization": 0.0,  # Placeholder
+            "operational_efficiency": 0.0,  # Placeholder
+            "customer_satisfaction": 0.0,  # Placeholder
+        }
+
+        return metrics
 
     async def _analyze_branch_patterns(
         self,
-        accounts: List[Dict[str, Any]],
-        employees: List[Employee]
+        account_count: int,
+        employee_counts: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Analyze branch operational patterns."""
-        try:
-            # Analyze patterns
-            patterns = {
-                "account_growth": {},
-                "employee_efficiency": {},
-                "transaction_volume": {},
-                "peak_hours": {},
-                "service_utilization": {}
-            }
-
-            return patterns
-
-        except Exception as e:
-            logger.error(f"Failed to analyze branch patterns: {str(e)}")
-            return {}
-
+        # Analyze patterns
+        patterns = {
+            "account_growth": {},
+            "employee_efficiency": {},
+            "role_distribution": employee_counts["role_distribution"],
+            "transaction_volume": {},
+            "peak_hours": {},
+            "service_utilization": {}
+        }
+
+        return patterns
+
+    @async_memoize(ttl=3600, key_fn=_branch_analytics_cache_key, version_key_fn=_branch_version_key)  # 1 hour
     async def get_branch_analytics(
         self,
         branch_id: int,
         time_range: str = "30d"
     ) -> Dict[str, Any]:
         """Get comprehensive branch analytics."""
-        cache_key = f"branch_analytics:{branch_id}:{time_range}"
-
-        # Check cache first
-        cached = await self.cache_manager.get(cache_key)
-        if cached:
-            return cached
-
         try:
-            # Get branch
+            # Database reads stay sequential: an AsyncSession does not allow
+            # concurrent operations on the same connection
             branch = await self.get_by_id(branch_id)
             if not branch:
                 logger.error(f"Branch {branch_id} not found")
                 return {}
 
-            # Get branch accounts
-            accounts = await self._get_branch_accounts(branch_id, time_range)
-
-            # Get branch employees
-            employees = await self._get_branch_employees(branch_id)
-
-            # Calculate branch metrics
-            branch_metrics = await self._calculate_branch_metrics(accounts, employees, branch)
+            # Count branch accounts and employees in the database
+            counts = await self._fetch_branch_metric_counts(branch_id)
 
-            # Analyze branch patterns
-            branch_analysis = await self._analyze_branch_patterns(accounts, employees)
-            
-            # Generate AI insights
-            ai_insights = await self.analyze_branch_performance(branch_id, time_range)
+            # Metrics, patterns and AI insights are independent of each other;
+            # only the AI insights touch the session
+            branch_metrics, branch_analysis, ai_insights = await asyncio.gather(
+                self._calculate_branch_metrics(counts["accounts"], counts["employees"], branch),
+                self._analyze_branch_patterns(counts["accounts"], counts["employees"]),
+                self.analyze_branch_performance(branch_id, time_range)
+            )
 
             analytics_result = {
                 "branch_id": branch_id,
@@ -476,12 +840,9 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
                 "branch_metrics": branch_metrics,
                 "branch_analysis": branch_analysis,
                 "ai_insights": ai_insights,
-                "generated_at": datetime.utcnow().isoformat()
+                "generated_at": _iso_now_second()
             }
 
-            # Cache the result
-            await self.cache_manager.set(cache_key, analytics_result, ttl=3600)  # 1 hour
-
             return analytics_result
 
         except Exception as e:
@@ -496,23 +857,24 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
     ) -> List[Employee]:
         """Get employees assigned to a branch."""
         try:
-            query = select(Employee).where(Employee.branch_id == branch_id)
+            query = lambda_stmt(lambda: select(Employee).where(Employee.branch_id == branch_id))
 
             if role:
-                query = query.where(Employee.role == role)
+                query += lambda s: s.where(Employee.role == role)
 
             if active_only:
-                query = query.where(Employee.is_active == True)
+                query += lambda s: s.where(Employee.is_active == True)
 
             result = await self.db_session.execute(query)
             employees = result.scalars().all()
 
             return employees
 
-        except Exception as e:
+        except SQLAlchemyError as e:
             logger.error(f"Failed to get branch employees: {str(e)}")
             return []
 
+    @async_memoize(ttl=60, key_fn=_employee_count_cache_key, version_key_fn=_branch_version_key)
     async def get_branch_employee_count(
         self,
         branch_id: int,
@@ -521,20 +883,20 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
     ) -> int:
         """Get count of employees assigned to a branch."""
         try:
-            query = select(func.count(Employee.id)).where(Employee.branch_id == branch_id)
+            query = lambda_stmt(lambda: select(func.count(Employee.id)).where(Employee.branch_id == branch_id))
 
             if role:
-                query = query.where(Employee.role == role)
+                query += lambda s: s.where(Employee.role == role)
 
             if active_only:
-                query = query.where(Employee.is_active == True)
+                query += lambda s: s.where(Employee.is_active == True)
 
             result = await self.db_session.execute(query)
             count = result.scalar_one()
 
             return count
 
-        except Exception as e:
+        except SQLAlchemyError as e:
             logger.error(f"Failed to get branch employee count: {str(e)}")
             return 0
 
@@ -545,19 +907,19 @@ class EnhancedBranchRepository(AIEnhancedRepository[Branch, BranchCreate, Branch
         """Analyze branch staffing needs and efficiency."""
         try:
             # Get branch data
-            branch = await self.get_by_id(branch_id)
+            branch = await self.get_by_id_for_ai(branch_id)
             if not branch:
                 logger.error(f"Branch {branch_id} not found")
                 return {}
 
-            # Get employees
-            employees = await self.get_branch_employees(branch_id)
+            # Get employees as column dictionaries
+            employees = await self._get_branch_employee_dicts(branch_id)
             
             # Analyze with AI
             staffing_analysis = await self.analyze_with_ai(
                 {
                     "branch_profile": branch.to_dict(),
-                    "employees": [employee.to_dict() for employee in employees],
+                    "employees": employees,
                     "branch_type": branch.branch_type.value,
                     "branch_size": branch.size if hasattr(branch, 'size') else "unknown"
                 },
@@ -3,23 +3,150 @@ Enhanced card repository with AI integration for card management and security an
 """
 from __future__ import annotations
 
+import asyncio
+import itertools
 import logging
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
-from sqlalchemy import and_, select, func, text
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, select, func, text, update, lambda_stmt
+from sqlalchemy.orm import raiseload, selectinload
 
 from app.models.card import Card, CardStatus, CardType
+from app.models.transaction import Transaction
 from app.schemas.account import CardCreate, CardUpdate
-from app.repositories.enhanced_base import AIEnhancedRepository
+from app.repositories.enhanced_base import AIEnhancedRepository, _DAY_NAMES, _cache_key_part, _run_analyzer
 from app.core.llm_orchestrator import TaskType, TaskComplexity
 # Exception imports removed for MVP
 # All custom exceptions replaced with standard logging
 
 logger = logging.getLogger(__name__)
 
+# Bounds for every orchestrator call in this repository; risk assessments
+# answer with a small JSON object, so they get a tighter output budget
+_AI_TIMEOUT = 20.0
+_AI_MAX_RETRIES = 2
+_RISK_OUTPUT_TOKENS = 256
+_ANALYSIS_OUTPUT_TOKENS = 512
+
+# Most recent transactions per card sent to a fraud analysis, so a busy card
+# cannot blow up the prompt; single-card and batched analyses share the bound
+_FRAUD_TRANSACTION_LIMIT = 200
+
+
+def _card_cache_key(prefix: str, *parts: Any) -> str:
+    """
+    Build a cache key from normalized parts.
+    
+    ``CardStatus.ACTIVE`` and ``"active"`` produce the same segment, so callers
+    passing either share one entry. Keys stay readable (not hashed) so the
+    per-card patterns in ``_invalidate_card_caches`` keep matching them.
+    """
+    return ":".join([prefix, *map(_cache_key_part, parts)])
+
+
+def _card_is_expired(card: Dict[str, Any]) -> bool:
+    """``Card.is_expired()`` for a card dictionary."""
+    return datetime.utcnow() > card["expiry_date"]
+
+
+def _spending_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze spending patterns from card transactions."""
+    try:
+        if not transactions:
+            return {"patterns": [], "total_spent": 0.0, "transaction_count": 0}
+
+        # Total and group by category in a single pass
+        total_spent = 0
+        category_spending = Counter()
+        for transaction in transactions:
+            amount = transaction.get("amount", 0)
+            total_spent += amount
+            category_spending[transaction.get("category", "unknown")] += amount
+
+        transaction_count = len(transactions)
+
+        # Find top spending categories
+        top_categories = category_spending.most_common(5)
+
+        return {
+            "patterns": {
+                "total_spent": total_spent,
+                "transaction_count": transaction_count,
+                "average_transaction": total_spent / transaction_count if transaction_count > 0 else 0,
+                "top_categories": top_categories,
+                "category_breakdown": dict(category_spending)
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze spending patterns: {str(e)}")
+        return {"patterns": [], "error": str(e)}
+
+
+def _temporal_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze temporal patterns from card transactions."""
+    try:
+        if not transactions:
+            return {"temporal_patterns": [], "peak_hours": [], "peak_days": []}
+
+        # Group by hour and day
+        hourly_patterns = Counter()
+        daily_patterns = Counter()
+
+        for transaction in transactions:
+            timestamp = transaction.get("timestamp")
+            if timestamp:
+                hourly_patterns[timestamp.hour] += 1
+                daily_patterns[_DAY_NAMES[timestamp.weekday()]] += 1
+
+        # Find peak hours and days
+        peak_hours = hourly_patterns.most_common(3)
+        peak_days = daily_patterns.most_common(3)
+
+        return {
+            "temporal_patterns": {
+                "hourly_distribution": dict(hourly_patterns),
+                "daily_distribution": dict(daily_patterns),
+                "peak_hours": peak_hours,
+                "peak_days": peak_days
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze temporal patterns: {str(e)}")
+        return {"temporal_patterns": [], "error": str(e)}
+
+
+def _geographic_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze geographic patterns from card transactions."""
+    try:
+        if not transactions:
+            return {"geographic_patterns": [], "top_locations": []}
+
+        # Group by location
+        location_patterns = Counter()
+
+        for transaction in transactions:
+            location_patterns[transaction.get("location", "unknown")] += transaction.get("amount", 0)
+
+        # Find top locations
+        top_locations = location_patterns.most_common(5)
+
+        return {
+            "geographic_patterns": {
+                "location_breakdown": dict(location_patterns),
+                "top_locations": top_locations,
+                "total_locations": len(location_patterns)
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze geographic patterns: {str(e)}")
+        return {"geographic_patterns": [], "error": str(e)}
+
 
 class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate]):
     """
@@ -41,28 +168,35 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
         card_type: Optional[CardType] = None,
         status: Optional[CardStatus] = None,
         use_cache: bool = True
-    ) -> List[Card]:
-        """Get all cards for a specific user with optional filtering."""
-        cache_key = f"user_cards:{user_id}:{card_type}:{status}:{include_inactive}"
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all cards for a specific user with optional filtering.
+
+        Cards are returned, and cached, as column dictionaries so cached
+        values are not bound to a session.
+        """
+        cache_key = _card_cache_key("user_cards", user_id, card_type, status, include_inactive)
         
         if use_cache:
             cached = await self.cache_manager.get(cache_key)
             if cached:
                 return cached
 
-        query = select(Card).where(Card.user_id == user_id)
+        # Callers only read card columns; fail fast on any relationship access.
+        # Built as a lambda statement so each filter combination compiles once
+        query = lambda_stmt(lambda: select(Card).where(Card.user_id == user_id).options(raiseload("*")))
 
         if not include_inactive:
-            query = query.where(Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION]))
+            query += lambda s: s.where(Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION]))
 
         if card_type:
-            query = query.where(Card.card_type == card_type)
+            query += lambda s: s.where(Card.card_type == card_type)
 
         if status:
-            query = query.where(Card.status == status)
+            query += lambda s: s.where(Card.status == status)
 
         result = await self.db_session.execute(query)
-        cards = result.scalars().all()
+        cards = [card.to_dict() for card in result.scalars()]
 
         if use_cache:
             await self.cache_manager.set(cache_key, cards, ttl=1800)  # 30 minutes
@@ -75,22 +209,23 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
         *,
         include_inactive: bool = False,
         use_cache: bool = True
-    ) -> List[Card]:
-        """Get all cards linked to a specific account."""
-        cache_key = f"account_cards:{account_id}:{include_inactive}"
+    ) -> List[Dict[str, Any]]:
+        """Get all cards linked to a specific account, as column dictionaries."""
+        cache_key = _card_cache_key("account_cards", account_id, include_inactive)
         
         if use_cache:
             cached = await self.cache_manager.get(cache_key)
             if cached:
                 return cached
 
-        query = select(Card).where(Card.account_id == account_id)
+        # Callers only read card columns; fail fast on any relationship access
+        query = lambda_stmt(lambda: select(Card).where(Card.account_id == account_id).options(raiseload("*")))
 
         if not include_inactive:
-            query = query.where(Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION]))
+            query += lambda s: s.where(Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION]))
 
         result = await self.db_session.execute(query)
-        cards = result.scalars().all()
+        cards = [card.to_dict() for card in result.scalars()]
 
         if use_cache:
             await self.cache_manager.set(cache_key, cards, ttl=1800)  # 30 minutes
@@ -116,11 +251,14 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             analysis_result = await self.analyze_with_ai(
                 card_data,
                 TaskType.RISK_ASSESSMENT,
-                TaskComplexity.HIGH
+                TaskComplexity.HIGH,
+                timeout=_AI_TIMEOUT,
+                max_retries=_AI_MAX_RETRIES,
+                max_output_tokens=_RISK_OUTPUT_TOKENS
             )
 
             # Cache the analysis
-            cache_key = f"card_security_analysis:{card_id}:{analysis_type}"
+            cache_key = _card_cache_key("card_security_analysis", card_id, analysis_type)
             await self.cache_manager.set(cache_key, analysis_result, ttl=3600)  # 1 hour
 
             return analysis_result
@@ -132,12 +270,21 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
     async def detect_card_fraud(
         self,
         card_id: Union[int, str, UUID],
-        time_range: str = "30d"
+        time_range: str = "30d",
+        transaction_data: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        """Detect potential fraud patterns for a card."""
+        """
+        Detect potential fraud patterns for a card.
+
+        Callers that already fetched the card's transactions can pass them as
+        ``transaction_data`` to skip the database read.
+        """
         try:
             # Get card transaction data
-            transaction_data = await self._get_card_transaction_data(card_id, time_range)
+            if transaction_data is None:
+                transaction_data = await self._get_card_transaction_data(
+                    card_id, time_range, per_card_limit=_FRAUD_TRANSACTION_LIMIT
+                )
 
             # Detect anomalies
             anomalies = await self.detect_anomalies(transaction_data, threshold=0.8)
@@ -146,7 +293,10 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             fraud_analysis = await self.analyze_with_ai(
                 {"transactions": transaction_data, "anomalies": anomalies},
                 TaskType.RISK_ASSESSMENT,
-                TaskComplexity.HIGH
+                TaskComplexity.HIGH,
+                timeout=_AI_TIMEOUT,
+                max_retries=_AI_MAX_RETRIES,
+                max_output_tokens=_RISK_OUTPUT_TOKENS
             )
 
             fraud_result = {
@@ -160,7 +310,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             }
 
             # Cache the fraud analysis
-            cache_key = f"card_fraud_analysis:{card_id}:{time_range}"
+            cache_key = _card_cache_key("card_fraud_analysis", card_id, time_range)
             await self.cache_manager.set(cache_key, fraud_result, ttl=1800)  # 30 minutes
 
             return fraud_result
@@ -183,11 +333,14 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             analysis_result = await self.analyze_with_ai(
                 usage_data,
                 TaskType.BEHAVIORAL_ANALYSIS,
-                TaskComplexity.MEDIUM
+                TaskComplexity.MEDIUM,
+                timeout=_AI_TIMEOUT,
+                max_retries=_AI_MAX_RETRIES,
+                max_output_tokens=_ANALYSIS_OUTPUT_TOKENS
             )
 
             # Cache the analysis
-            cache_key = f"card_usage_analysis:{card_id}:{time_range}"
+            cache_key = _card_cache_key("card_usage_analysis", card_id, time_range)
             await self.cache_manager.set(cache_key, analysis_result, ttl=3600)  # 1 hour
 
             return analysis_result
@@ -210,11 +363,14 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             recommendations = await self.analyze_with_ai(
                 user_data,
                 TaskType.FINANCIAL_RECOMMENDATION,
-                TaskComplexity.MEDIUM
+                TaskComplexity.MEDIUM,
+                timeout=_AI_TIMEOUT,
+                max_retries=_AI_MAX_RETRIES,
+                max_output_tokens=_ANALYSIS_OUTPUT_TOKENS
             )
 
             # Cache the recommendations
-            cache_key = f"card_recommendations:{user_id}:{account_id}"
+            cache_key = _card_cache_key("card_recommendations", user_id, account_id)
             await self.cache_manager.set(cache_key, recommendations, ttl=7200)  # 2 hours
 
             return recommendations
@@ -241,7 +397,10 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             security_analysis = await self.analyze_with_ai(
                 security_data,
                 TaskType.RISK_ASSESSMENT,
-                TaskComplexity.HIGH
+                TaskComplexity.HIGH,
+                timeout=_AI_TIMEOUT,
+                max_retries=_AI_MAX_RETRIES,
+                max_output_tokens=_RISK_OUTPUT_TOKENS
             )
 
             # Generate security alerts
@@ -257,7 +416,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             }
 
             # Cache the security monitoring result
-            cache_key = f"card_security_monitoring:{card_id}"
+            cache_key = _card_cache_key("card_security_monitoring", card_id)
             await self.cache_manager.set(cache_key, security_result, ttl=1800)  # 30 minutes
 
             return security_result
@@ -274,11 +433,17 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
     ) -> int:
         """Bulk update card status for multiple cards."""
         try:
-            # Update cards
-            updated_count = await self.bulk_update(
-                {"id": {"$in": card_ids}},
-                {"status": new_status, "updated_at": datetime.utcnow()}
+            if not card_ids:
+                return 0
+
+            query = (
+                update(Card)
+                .where(Card.id.in_(card_ids))
+                .values(status=new_status, updated_at=datetime.utcnow())
             )
+            async with self._write_transaction():
+                result = await self.db_session.execute(query)
+            updated_count = result.rowcount
 
             # Invalidate related caches
             await self._invalidate_card_caches(card_ids)
@@ -299,15 +464,20 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
         try:
             expiry_date = datetime.utcnow() + timedelta(days=days_threshold)
             
-            query = select(Card).where(
-                and_(
-                    Card.expiry_date <= expiry_date,
-                    Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION])
-                )
+            # Matches the ix_card_status_expiry partial index, so this is a range scan
+            # over usable cards only; the bound stays a parameter rather than
+            # dialect-specific interval arithmetic
+            query = lambda_stmt(
+                lambda: select(Card).where(
+                    and_(
+                        Card.status.in_([CardStatus.ACTIVE, CardStatus.PENDING_ACTIVATION]),
+                        Card.expiry_date <= expiry_date
+                    )
+                ).options(raiseload("*"))
             )
 
             if user_id:
-                query = query.where(Card.user_id == user_id)
+                query += lambda s: s.where(Card.user_id == user_id)
 
             result = await self.db_session.execute(query)
             expiring_cards = result.scalars().all()
@@ -320,19 +490,54 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
 
     async def get_suspicious_cards(
         self,
-        risk_threshold: float = 0.7
+        risk_threshold: float = 0.7,
+        max_concurrency: int = 10
     ) -> List[Dict[str, Any]]:
-        """Get cards with suspicious activity patterns."""
+        """
+        Get cards with suspicious activity patterns.
+
+        Fraud analyses cached by ``detect_card_fraud`` are reused; the other
+        cards are analyzed concurrently, at most ``max_concurrency`` at a time.
+        """
         try:
             # Get all active cards
             active_cards = await self.get_multi(status=CardStatus.ACTIVE)
 
+            # Look up every card's cached fraud analysis in one call
+            fraud_analyses = await self.cache_manager.mget(
+                [_card_cache_key("card_fraud_analysis", card.id, "30d") for card in active_cards]
+            )
+            missing = [
+                index for index, fraud_analysis in enumerate(fraud_analyses) if not fraud_analysis
+            ]
+
+            # Read the remaining cards' transactions in one query up front, so the
+            # concurrent analyses below only await the orchestrator, never the session
+            transactions = await self._get_cards_transaction_data_batch(
+                [active_cards[index].id for index in missing], "30d",
+                per_card_limit=_FRAUD_TRANSACTION_LIMIT
+            )
+
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def analyze(card: Card) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.detect_card_fraud(card.id, "30d", transactions[card.id])
+
+            fresh_analyses = await asyncio.gather(
+                *(analyze(active_cards[index]) for index in missing),
+                return_exceptions=True
+            )
+            for index, fraud_analysis in zip(missing, fresh_analyses):
+                fraud_analyses[index] = fraud_analysis
+
             suspicious_cards = []
 
-            for card in active_cards:
-                # Analyze each card for suspicious activity
-                fraud_analysis = await self.detect_card_fraud(card.id, "30d")
-                
+            for card, fraud_analysis in zip(active_cards, fraud_analyses):
+                if isinstance(fraud_analysis, Exception):
+                    logger.error(f"Card fraud detection failed for card {card.id}: {str(fraud_analysis)}")
+                    continue
+
                 if fraud_analysis.get("fraud_risk_score", 0.0) >= risk_threshold:
                     suspicious_cards.append({
                         "card_id": str(card.id),
@@ -363,20 +568,23 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             # Get user's cards
             user_cards = await self.get_cards_by_user(user_id, include_inactive=True)
             
-            # Get card usage data
-            card_usage_data = []
-            for card in user_cards:
-                usage_data = await self._get_card_usage_data(card.id, time_range or "30d")
-                card_usage_data.append(usage_data)
+            # Get card usage data, reading all cards' transactions in one query
+            transactions = await self._get_cards_transaction_data_batch(
+                [card["id"] for card in user_cards], time_range or "30d"
+            )
+            now = datetime.utcnow()
+            card_usage_data = [
+                self._build_card_usage_data(card, transactions[card["id"]], now) for card in user_cards
+            ]
 
             return {
                 "user_id": user_id,
                 "data_type": data_type,
                 "time_range": time_range,
-                "cards": [card.to_dict() for card in user_cards],
+                "cards": user_cards,
                 "card_usage_data": card_usage_data,
                 "total_cards": len(user_cards),
-                "active_cards": len([c for c in user_cards if c.status == CardStatus.ACTIVE])
+                "active_cards": sum(1 for c in user_cards if c["status"] == CardStatus.ACTIVE)
             }
 
         except Exception as e:
@@ -393,13 +601,12 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             # Get user's cards
             user_cards = await self.get_cards_by_user(user_id, include_inactive=True)
             
-            # Get transactions for each card
-            all_transactions = []
-            for card in user_cards:
-                card_transactions = await self._get_card_transaction_data(card.id, time_range)
-                all_transactions.extend(card_transactions)
+            # Get transactions for all cards in one query
+            card_transactions = await self._get_cards_transaction_data_batch(
+                [card["id"] for card in user_cards], time_range
+            )
 
-            return all_transactions
+            return list(itertools.chain.from_iterable(card_transactions.values()))
 
         except Exception as e:
             logger.error(f"Failed to get user transactions: {str(e)}")
@@ -412,19 +619,34 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             user_cards = await self.get_cards_by_user(user_id, include_inactive=True)
             
             # Calculate risk metrics
+            # The cards are returned in the payload anyway, so count them in one pass
+            # rather than issuing a separate aggregate query
+            status_counts = Counter()
+            expired_cards = 0
+            for card in user_cards:
+                status_counts[card["status"]] += 1
+                if _card_is_expired(card):
+                    expired_cards += 1
+
             total_cards = len(user_cards)
-            active_cards = len([c for c in user_cards if c.status == CardStatus.ACTIVE])
-            blocked_cards = len([c for c in user_cards if c.status == CardStatus.BLOCKED])
-            expired_cards = len([c for c in user_cards if c.is_expired()])
-
-            # Get recent fraud analysis
-            recent_fraud_scores = []
-            for card in user_cards[:5]:  # Analyze last 5 cards
-                try:
-                    fraud_analysis = await self.detect_card_fraud(card.id, "30d")
-                    recent_fraud_scores.append(fraud_analysis.get("fraud_risk_score", 0.0))
-                except Exception:
-                    recent_fraud_scores.append(0.0)
+            active_cards = status_counts[CardStatus.ACTIVE]
+            blocked_cards = status_counts[CardStatus.BLOCKED]
+
+            # Get recent fraud analysis for the last 5 cards, reading their
+            # transactions in one query and running the analyses concurrently
+            recent_cards = user_cards[:5]
+            transactions = await self._get_cards_transaction_data_batch(
+                [card["id"] for card in recent_cards], "30d",
+                per_card_limit=_FRAUD_TRANSACTION_LIMIT
+            )
+            fraud_analyses = await asyncio.gather(
+                *(self.detect_card_fraud(card["id"], "30d", transactions[card["id"]]) for card in recent_cards),
+                return_exceptions=True
+            )
+            recent_fraud_scores = [
+                0.0 if isinstance(fraud_analysis, Exception) else fraud_analysis.get("fraud_risk_score", 0.0)
+                for fraud_analysis in fraud_analyses
+            ]
 
             return {
                 "user_id": user_id,
@@ -433,7 +655,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
                 "blocked_cards": blocked_cards,
                 "expired_cards": expired_cards,
                 "average_fraud_risk_score": sum(recent_fraud_scores) / len(recent_fraud_scores) if recent_fraud_scores else 0.0,
-                "cards": [card.to_dict() for card in user_cards]
+                "cards": user_cards
             }
 
         except Exception as e:
@@ -445,116 +667,21 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze spending patterns from card transactions."""
-        try:
-            if not transactions:
-                return {"patterns": [], "total_spent": 0.0, "transaction_count": 0}
-
-            # Calculate basic metrics
-            total_spent = sum(t.get("amount", 0) for t in transactions)
-            transaction_count = len(transactions)
-            
-            # Group by category
-            category_spending = {}
-            for transaction in transactions:
-                category = transaction.get("category", "unknown")
-                amount = transaction.get("amount", 0)
-                category_spending[category] = category_spending.get(category, 0) + amount
-
-            # Find top spending categories
-            top_categories = sorted(
-                category_spending.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:5]
-
-            return {
-                "patterns": {
-                    "total_spent": total_spent,
-                    "transaction_count": transaction_count,
-                    "average_transaction": total_spent / transaction_count if transaction_count > 0 else 0,
-                    "top_categories": top_categories,
-                    "category_breakdown": category_spending
-                }
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze spending patterns: {str(e)}")
-            return {"patterns": [], "error": str(e)}
+        return await _run_analyzer(_spending_patterns, transactions)
 
     async def _analyze_temporal_patterns(
         self,
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze temporal patterns from card transactions."""
-        try:
-            if not transactions:
-                return {"temporal_patterns": [], "peak_hours": [], "peak_days": []}
-
-            # Group by hour and day
-            hourly_patterns = {}
-            daily_patterns = {}
-            
-            for transaction in transactions:
-                timestamp = transaction.get("timestamp")
-                if timestamp:
-                    hour = timestamp.hour
-                    day = timestamp.strftime("%A")
-                    
-                    hourly_patterns[hour] = hourly_patterns.get(hour, 0) + 1
-                    daily_patterns[day] = daily_patterns.get(day, 0) + 1
-
-            # Find peak hours and days
-            peak_hours = sorted(hourly_patterns.items(), key=lambda x: x[1], reverse=True)[:3]
-            peak_days = sorted(daily_patterns.items(), key=lambda x: x[1], reverse=True)[:3]
-
-            return {
-                "temporal_patterns": {
-                    "hourly_distribution": hourly_patterns,
-                    "daily_distribution": daily_patterns,
-                    "peak_hours": peak_hours,
-                    "peak_days": peak_days
-                }
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze temporal patterns: {str(e)}")
-            return {"temporal_patterns": [], "error": str(e)}
+        return await _run_analyzer(_temporal_patterns, transactions)
 
     async def _analyze_geographic_patterns(
         self,
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze geographic patterns from card transactions."""
-        try:
-            if not transactions:
-                return {"geographic_patterns": [], "top_locations": []}
-
-            # Group by location
-            location_patterns = {}
-            
-            for transaction in transactions:
-                location = transaction.get("location", "unknown")
-                amount = transaction.get("amount", 0)
-                location_patterns[location] = location_patterns.get(location, 0) + amount
-
-            # Find top locations
-            top_locations = sorted(
-                location_patterns.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:5]
-
-            return {
-                "geographic_patterns": {
-                    "location_breakdown": location_patterns,
-                    "top_locations": top_locations,
-                    "total_locations": len(location_patterns)
-                }
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze geographic patterns: {str(e)}")
-            return {"geographic_patterns": [], "error": str(e)}
+        return await _run_analyzer(_geographic_patterns, transactions)
 
     async def _perform_risk_analysis(
         self,
@@ -566,10 +693,16 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             cards = user_data.get("cards", [])
             
             # Calculate risk metrics
+            status_counts = Counter()
+            expired_cards = 0
+            for card in cards:
+                status_counts[card.get("status")] += 1
+                if card.get("is_expired", False):
+                    expired_cards += 1
+
             total_cards = len(cards)
-            active_cards = len([c for c in cards if c.get("status") == CardStatus.ACTIVE])
-            blocked_cards = len([c for c in cards if c.get("status") == CardStatus.BLOCKED])
-            expired_cards = len([c for c in cards if c.get("is_expired", False)])
+            active_cards = status_counts[CardStatus.ACTIVE]
+            blocked_cards = status_counts[CardStatus.BLOCKED]
 
             # Calculate risk score
             risk_score = 0.0
@@ -617,14 +750,15 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             # Get recent transactions
             recent_transactions = await self._get_card_transaction_data(card_id, "30d")
 
+            now = datetime.utcnow()
             return {
                 "card_info": card.to_dict(),
                 "recent_transactions": recent_transactions,
                 "security_metrics": {
                     "failed_attempts": card.pin_retry_attempts,
                     "is_locked": card.is_locked,
-                    "days_since_last_used": (datetime.utcnow() - card.last_used).days if card.last_used else None,
-                    "days_until_expiry": (card.expiry_date - datetime.utcnow().date()).days if card.expiry_date else None
+                    "days_since_last_used": (now - card.last_used).days if card.last_used else None,
+                    "days_until_expiry": (card.expiry_date - now).days if card.expiry_date else None
                 }
             }
 
@@ -635,26 +769,92 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
     async def _get_card_transaction_data(
         self,
         card_id: Union[int, str, UUID],
-        time_range: str
+        time_range: str,
+        per_card_limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get card transaction data for analysis."""
-        try:
-            # This would typically query the transaction repository
-            # For now, return mock data
-            return [
-                {
-                    "id": "1",
-                    "amount": 100.0,
-                    "category": "groceries",
-                    "timestamp": datetime.utcnow(),
-                    "location": "New York",
-                    "status": "completed"
-                }
-            ]
+        transactions = await self._get_cards_transaction_data_batch([card_id], time_range, per_card_limit)
+        return transactions[card_id]
 
-        except Exception as e:
-            logger.error(f"Failed to get card transaction data: {str(e)}")
-            return []
+    async def _get_cards_transaction_data_batch(
+        self,
+        card_ids: List[Union[int, str, UUID]],
+        time_range: str,
+        per_card_limit: Optional[int] = None
+    ) -> Dict[Union[int, str, UUID], List[Dict[str, Any]]]:
+        """
+        Get transaction data for several cards with a single query.
+
+        Returns transactions keyed by the caller's card IDs, in input order;
+        cards without transactions map to an empty list. IDs are matched by
+        their string form, so ``5`` and ``"5"`` find the same rows.
+        ``per_card_limit`` keeps only each card's most recent transactions,
+        ranked with ROW_NUMBER() per card. The query is served by the
+        ``(card_id, transaction_date DESC)`` index. Database errors propagate,
+        so callers never analyze an empty result as if the card had no activity.
+        """
+        # One list per distinct ID, shared by every spelling the caller passed
+        transactions_by_key: Dict[str, List[Dict[str, Any]]] = {}
+        query_ids = []
+        transactions_by_card: Dict[Union[int, str, UUID], List[Dict[str, Any]]] = {}
+        for card_id in card_ids:
+            key = str(card_id)
+            if key not in transactions_by_key:
+                transactions_by_key[key] = []
+                query_ids.append(card_id)
+            transactions_by_card[card_id] = transactions_by_key[key]
+        if not transactions_by_card:
+            return transactions_by_card
+
+        start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+
+        columns = (
+            Transaction.id,
+            Transaction.card_id,
+            Transaction.amount,
+            Transaction.category,
+            Transaction.transaction_date,
+            Transaction.location,
+            Transaction.status
+        )
+        criteria = (
+            Transaction.card_id.in_(query_ids),
+            Transaction.transaction_date >= start_date
+        )
+
+        if per_card_limit:
+            row_number = func.row_number().over(
+                partition_by=Transaction.card_id,
+                order_by=Transaction.transaction_date.desc()
+            ).label("row_number")
+            ranked = select(*columns, row_number).where(*criteria).subquery()
+            query = (
+                select(*(ranked.c[column.key] for column in columns))
+                .where(ranked.c.row_number <= per_card_limit)
+                .order_by(ranked.c.card_id, ranked.c.transaction_date)
+            )
+        else:
+            query = (
+                select(*columns)
+                .where(*criteria)
+                .order_by(Transaction.card_id, Transaction.transaction_date)
+            )
+        result = await self.db_session.execute(query)
+
+        for row in result:
+            card_transactions = transactions_by_key.get(str(row.card_id))
+            if card_transactions is None:
+                continue
+            card_transactions.append({
+                "id": str(row.id),
+                "amount": float(row.amount),
+                "category": row.category.value if row.category else "unknown",
+                "timestamp": row.transaction_date,
+                "location": (row.location or {}).get("address", "unknown"),
+                "status": row.status.value
+            })
+
+        return transactions_by_card
 
     async def _get_card_usage_data(
         self,
@@ -670,21 +870,37 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             # Get transaction data
             transactions = await self._get_card_transaction_data(card_id, time_range)
 
-            return {
-                "card_info": card.to_dict(),
-                "transactions": transactions,
-                "usage_metrics": {
-                    "total_transactions": len(transactions),
-                    "total_amount": sum(t.get("amount", 0) for t in transactions),
-                    "last_used": card.last_used,
-                    "days_since_last_used": (datetime.utcnow() - card.last_used).days if card.last_used else None
-                }
-            }
+            return self._build_card_usage_data(card.to_dict(), transactions)
 
         except Exception as e:
             logger.error(f"Failed to get card usage data: {str(e)}")
             return {"error": str(e)}
 
+    def _build_card_usage_data(
+        self,
+        card: Dict[str, Any],
+        transactions: List[Dict[str, Any]],
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Build card usage data from a card dictionary and its transactions.
+        
+        Callers building data for several cards pass one ``now`` so every card
+        is measured against the same instant.
+        """
+        now = now or datetime.utcnow()
+        last_used = card["last_used"]
+        return {
+            "card_info": card,
+            "transactions": transactions,
+            "usage_metrics": {
+                "total_transactions": len(transactions),
+                "total_amount": sum(t.get("amount", 0) for t in transactions),
+                "last_used": last_used,
+                "days_since_last_used": (now - last_used).days if last_used else None
+            }
+        }
+
     async def _get_user_card_data(
         self,
         user_id: int,
@@ -698,19 +914,22 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             else:
                 user_cards = await self.get_cards_by_user(user_id)
 
-            # Get usage data for each card
-            card_usage_data = []
-            for card in user_cards:
-                usage_data = await self._get_card_usage_data(card.id, "90d")
-                card_usage_data.append(usage_data)
+            # Get usage data, reading all cards' transactions in one query
+            transactions = await self._get_cards_transaction_data_batch(
+                [card["id"] for card in user_cards], "90d"
+            )
+            now = datetime.utcnow()
+            card_usage_data = [
+                self._build_card_usage_data(card, transactions[card["id"]], now) for card in user_cards
+            ]
 
             return {
                 "user_id": user_id,
                 "account_id": account_id,
-                "cards": [card.to_dict() for card in user_cards],
+                "cards": user_cards,
                 "card_usage_data": card_usage_data,
                 "total_cards": len(user_cards),
-                "active_cards": len([c for c in user_cards if c.status == CardStatus.ACTIVE])
+                "active_cards": sum(1 for c in user_cards if c["status"] == CardStatus.ACTIVE)
             }
 
         except Exception as e:
@@ -730,14 +949,15 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
             # Get recent security events
             recent_transactions = await self._get_card_transaction_data(card_id, "7d")
 
+            now = datetime.utcnow()
             return {
                 "card_info": card.to_dict(),
                 "recent_transactions": recent_transactions,
                 "security_status": {
                     "is_locked": card.is_locked,
                     "failed_attempts": card.pin_retry_attempts,
-                    "is_expired": card.is_expired(),
-                    "days_until_expiry": (card.expiry_date - datetime.utcnow().date()).days if card.expiry_date else None
+                    "is_expired": now > card.expiry_date,
+                    "days_until_expiry": (card.expiry_date - now).days if card.expiry_date else None
                 }
             }
 
@@ -754,13 +974,17 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
         alerts = []
 
         try:
+            # One timestamp for the whole batch, so correlated alerts line up
+            now = datetime.utcnow()
+            now_iso = now.isoformat()
+
             # Check for expired card
-            if card.is_expired():
+            if now > card.expiry_date:
                 alerts.append({
                     "type": "expired_card",
                     "severity": "high",
                     "message": "Card has expired and should be replaced",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 })
 
             # Check for too many failed attempts
@@ -769,7 +993,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
                     "type": "multiple_failed_attempts",
                     "severity": "medium",
                     "message": "Multiple failed PIN attempts detected",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 })
 
             # Check for high risk score
@@ -779,7 +1003,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
                     "type": "high_risk_card",
                     "severity": "high",
                     "message": f"High risk score detected: {risk_score}",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 })
 
             # Check for unusual activity
@@ -788,7 +1012,7 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
                     "type": "unusual_activity",
                     "severity": "medium",
                     "message": "Unusual card activity detected",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now_iso
                 })
 
         except Exception as e:
@@ -799,17 +1023,19 @@ class EnhancedCardRepository(AIEnhancedRepository[Card, CardCreate, CardUpdate])
     async def _invalidate_card_caches(self, card_ids: List[Union[int, str, UUID]]) -> None:
         """Invalidate caches related to specific cards."""
         try:
-            for card_id in card_ids:
-                cache_patterns = [
+            cache_patterns = [
+                pattern
+                for card_id in card_ids
+                for pattern in (
                     f"card_security_analysis:{card_id}:*",
                     f"card_fraud_analysis:{card_id}:*",
                     f"card_usage_analysis:{card_id}:*",
                     f"card_security_monitoring:{card_id}"
-                ]
-                
-                # Clear related caches
-                for pattern in cache_patterns:
-                    await self.cache_manager.delete(pattern)
+                )
+            ]
+            
+            # Clear related caches in one call
+            await self.cache_manager.delete_patterns(cache_patterns)
 
         except Exception as e:
             logger.error(f"Failed to invalidate card caches: {str(e)}") 
\ No newline at end of file
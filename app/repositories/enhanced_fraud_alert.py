@@ -3,21 +3,350 @@ Enhanced fraud alert repository with AI integration for fraud detection and aler
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Union
 from uuid import UUID
 
-from sqlalchemy import and_, select, func, text, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, case, select, func, text, desc, update
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.orm import raiseload, selectinload
 
-from app.models.fraud_alert import FraudAlert, FraudAlertType, FraudAlertStatus, FraudAlertSeverity
+from app.models.fraud_alert import (
+    FraudAlert, FraudAlertType, FraudAlertStatus, FraudAlertSeverity, fraud_alert_daily
+)
 from app.schemas.ai import FraudAlertCreate, FraudAlertUpdate
-from app.repositories.enhanced_base import AIEnhancedRepository
+from app.repositories.enhanced_base import AIEnhancedRepository, _DAY_NAMES, _cache_key_part, _run_analyzer
 from app.core.llm_orchestrator import TaskType, TaskComplexity
 
 logger = logging.getLogger(__name__)
 
+# Cached alert lists and analyses are indexed in per-user and per-account tag
+# sets, so invalidation deletes exactly those keys instead of scanning the cache.
+# Tags outlive the longest entry they index.
+_TAG_TTL = 3600
+
+
+# IDs per IN list (bulk UPDATEs and multi-alert reads); stays under SQL
+# Server's 2100 bound-parameter limit
+_ID_CHUNK_SIZE = 2000
+
+# Rows fetched per round trip when streaming alert rows
+_STREAM_BATCH_SIZE = 1000
+
+# Set once fraud_alert_daily turns out not to exist (migration 007 creates it
+# on SQL Server only), so later trend queries aggregate fraud_alerts directly
+_daily_rollup_missing = False
+
+# Supported time_range values, resolved by lookup rather than parsed per call
+_TIME_RANGE_WINDOWS: Dict[str, timedelta] = {
+    "1d": timedelta(days=1),
+    "7d": timedelta(days=7),
+    "14d": timedelta(days=14),
+    "30d": timedelta(days=30),
+    "60d": timedelta(days=60),
+    "90d": timedelta(days=90),
+    "180d": timedelta(days=180),
+    "365d": timedelta(days=365)
+}
+
+
+def _resolve_window(time_range: str) -> datetime:
+    """Return the start of the window named by ``time_range``, e.g. ``"30d"``."""
+    try:
+        return datetime.utcnow() - _TIME_RANGE_WINDOWS[time_range]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported time range {time_range!r}; expected one of {', '.join(_TIME_RANGE_WINDOWS)}"
+        ) from None
+
+
+# Columns sent to AI analyses; mirrors FraudAlert.to_analysis_dict()
+_ANALYSIS_COLUMNS = (
+    FraudAlert.alert_id,
+    FraudAlert.alert_type,
+    FraudAlert.severity,
+    FraudAlert.risk_score,
+    FraudAlert.status,
+    FraudAlert.is_confirmed_fraud,
+    FraudAlert.is_false_positive,
+    FraudAlert.created_at
+)
+
+# Prioritization also weighs the alert's narrative and impact
+_PRIORITY_COLUMNS = _ANALYSIS_COLUMNS + (
+    FraudAlert.title,
+    FraudAlert.description,
+    FraudAlert.confidence,
+    FraudAlert.financial_impact,
+    FraudAlert.requires_customer_contact
+)
+
+
+def _analysis_row(row: Any) -> Dict[str, Any]:
+    """``FraudAlert.to_analysis_dict()`` for a projected ``_ANALYSIS_COLUMNS`` row."""
+    return {
+        "alert_id": row["alert_id"],
+        "alert_type": row["alert_type"].value if row["alert_type"] else None,
+        "severity": row["severity"].value if row["severity"] else None,
+        "risk_score": row["risk_score"],
+        "status": row["status"].value if row["status"] else None,
+        "is_confirmed_fraud": row["is_confirmed_fraud"],
+        "is_false_positive": row["is_false_positive"],
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None
+    }
+
+
+def _summarize_alerts(alerts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarize alert analysis dictionaries in a single pass.
+
+    In-memory counterpart of ``_aggregate_alerts`` for alerts that are already
+    loaded; counts, risk average and both distributions share one loop.
+    """
+    severity_counts: Counter = Counter()
+    type_counts: Counter = Counter()
+    total = confirmed = false_positives = pending = risk_count = 0
+    risk_sum = 0.0
+
+    for alert in alerts:
+        total += 1
+        severity_counts[alert.get("severity") or "unknown"] += 1
+        type_counts[alert.get("alert_type") or "unknown"] += 1
+        if alert.get("is_confirmed_fraud"):
+            confirmed += 1
+        if alert.get("is_false_positive"):
+            false_positives += 1
+        if alert.get("status") == FraudAlertStatus.ACTIVE.value:
+            pending += 1
+        risk_score = alert.get("risk_score")
+        if risk_score is not None:
+            risk_sum += risk_score
+            risk_count += 1
+
+    return {
+        "total_alerts": total,
+        "confirmed_fraud": confirmed,
+        "false_positives": false_positives,
+        "pending_investigation": pending,
+        "high_risk_alerts": severity_counts["high"] + severity_counts["critical"],
+        "average_risk_score": risk_sum / risk_count if risk_count else 0.0,
+        "severity_distribution": {"low": 0, "medium": 0, "high": 0, "critical": 0, **severity_counts},
+        "type_distribution": dict(type_counts)
+    }
+
+
+def _fold_alert_aggregates(rows: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Fold grouped alert aggregate rows into totals and both distributions.
+
+    Rows carry severity, alert_type, total, confirmed, false_positives, pending,
+    risk_sum and risk_count, whether grouped live or read from the daily rollup.
+    """
+    severity_distribution = {"low": 0, "medium": 0, "high": 0, "critical": 0}
+    type_distribution: Dict[str, int] = {}
+    total = confirmed = false_positives = pending = risk_count = 0
+    risk_sum = 0.0
+
+    for row in rows:
+        severity = row.severity.value if row.severity else "unknown"
+        type_value = row.alert_type.value if row.alert_type else "unknown"
+        severity_distribution[severity] = severity_distribution.get(severity, 0) + row.total
+        type_distribution[type_value] = type_distribution.get(type_value, 0) + row.total
+        total += row.total
+        confirmed += row.confirmed or 0
+        false_positives += row.false_positives or 0
+        pending += row.pending or 0
+        risk_sum += row.risk_sum or 0.0
+        risk_count += row.risk_count or 0
+
+    return {
+        "total_alerts": total,
+        "confirmed_fraud": confirmed,
+        "false_positives": false_positives,
+        "pending_investigation": pending,
+        "average_risk_score": risk_sum / risk_count if risk_count else 0.0,
+        "severity_distribution": severity_distribution,
+        "type_distribution": type_distribution
+    }
+
+
+# Hours counted as late-night activity by the temporal analysis
+_LATE_NIGHT_HOURS = frozenset({22, 23, 0, 1, 2, 3, 4, 5})
+
+
+def _spending_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze spending patterns for fraud detection."""
+    try:
+        if not transactions:
+            return {"patterns": [], "fraud_indicators": []}
+
+        # Total and group by category and location in a single pass
+        total_amount = 0
+        category_patterns = Counter()
+        location_patterns = Counter()
+        for transaction in transactions:
+            amount = transaction.get("amount", 0)
+            total_amount += amount
+            category_patterns[transaction.get("category", "unknown")] += amount
+            location_patterns[transaction.get("location", "unknown")] += amount
+
+        transaction_count = len(transactions)
+
+        # Detect potential fraud indicators
+        fraud_indicators = []
+
+        # Check for unusual amounts
+        if total_amount > 10000:  # High amount threshold
+            fraud_indicators.append("high_transaction_amount")
+
+        # Check for unusual locations
+        if len(location_patterns) > 10:  # Many different locations
+            fraud_indicators.append("multiple_locations")
+
+        return {
+            "patterns": {
+                "total_amount": total_amount,
+                "transaction_count": transaction_count,
+                "average_transaction": total_amount / transaction_count if transaction_count > 0 else 0,
+                "category_patterns": dict(category_patterns),
+                "location_patterns": dict(location_patterns)
+            },
+            "fraud_indicators": fraud_indicators
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze spending patterns: {str(e)}")
+        return {"patterns": [], "fraud_indicators": [], "error": str(e)}
+
+
+def _temporal_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze temporal patterns for fraud detection."""
+    try:
+        if not transactions:
+            return {"temporal_patterns": [], "fraud_indicators": []}
+
+        # Group by hour and day, counting late-night activity in the same pass
+        hourly_patterns = Counter()
+        daily_patterns = Counter()
+        late_night_transactions = 0
+
+        for transaction in transactions:
+            timestamp = transaction.get("timestamp")
+            if timestamp:
+                hour = timestamp.hour
+                hourly_patterns[hour] += 1
+                daily_patterns[_DAY_NAMES[timestamp.weekday()]] += 1
+                if hour in _LATE_NIGHT_HOURS:
+                    late_night_transactions += 1
+
+        # Detect temporal fraud indicators
+        fraud_indicators = []
+
+        # Check for unusual hours (late night transactions)
+        if late_night_transactions > len(transactions) * 0.3:  # More than 30% at night
+            fraud_indicators.append("unusual_timing")
+
+        return {
+            "temporal_patterns": {
+                "hourly_distribution": dict(hourly_patterns),
+                "daily_distribution": dict(daily_patterns),
+                "late_night_transactions": late_night_transactions
+            },
+            "fraud_indicators": fraud_indicators
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze temporal patterns: {str(e)}")
+        return {"temporal_patterns": [], "fraud_indicators": [], "error": str(e)}
+
+
+def _geographic_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Analyze geographic patterns for fraud detection."""
+    try:
+        if not transactions:
+            return {"geographic_patterns": [], "fraud_indicators": []}
+
+        # Group by location
+        location_patterns = Counter()
+        for transaction in transactions:
+            location_patterns[transaction.get("location", "unknown")] += transaction.get("amount", 0)
+
+        # Detect geographic fraud indicators
+        fraud_indicators = []
+
+        # Check for multiple locations
+        if len(location_patterns) > 5:  # Many different locations
+            fraud_indicators.append("multiple_locations")
+
+        # Check for unusual locations
+        unusual_locations = [loc for loc in location_patterns if "unknown" in loc.lower()]
+        if unusual_locations:
+            fraud_indicators.append("unusual_locations")
+
+        return {
+            "geographic_patterns": {
+                "location_breakdown": dict(location_patterns),
+                "total_locations": len(location_patterns),
+                "unusual_locations": unusual_locations
+            },
+            "fraud_indicators": fraud_indicators
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze geographic patterns: {str(e)}")
+        return {"geographic_patterns": [], "fraud_indicators": [], "error": str(e)}
+
+
+def _user_alerts_tag(user_id: Any) -> str:
+    return f"tag:fraud_user:{user_id}"
+
+
+def _account_alerts_tag(account_id: Any) -> str:
+    return f"tag:fraud_account:{account_id}"
+
+
+def _user_alerts_cache_key(
+    user_id: int,
+    status: Optional[FraudAlertStatus] = None,
+    severity: Optional[FraudAlertSeverity] = None,
+    time_range: str = "30d"
+) -> str:
+    return (
+        f"user_fraud_alerts:v2:{user_id}:{_cache_key_part(status, 'all')}:"
+        f"{_cache_key_part(severity, 'all')}:{time_range}"
+    )
+
+
+def _account_alerts_cache_key(
+    account_id: int,
+    status: Optional[FraudAlertStatus] = None,
+    time_range: str = "30d"
+) -> str:
+    return f"account_fraud_alerts:v2:{account_id}:{_cache_key_part(status, 'all')}:{time_range}"
+
+
+def _fraud_pattern_cache_key(user_id: int, time_range: str) -> str:
+    return f"fraud_pattern_analysis:{user_id}:{time_range}"
+
+
+def _alert_analysis_cache_key(alert_id: Union[int, str, UUID]) -> str:
+    return f"alert_ai_analysis:{alert_id}"
+
+
+def _user_risk_cache_key(user_id: int, time_range: str) -> str:
+    return f"user_risk:{user_id}:{time_range}"
+
+
+def _fraud_trends_cache_key(
+    time_range: str,
+    alert_type: Optional[FraudAlertType] = None,
+    sample_size: int = 500
+) -> str:
+    return f"analytics:fraud_trends:{time_range}:{_cache_key_part(alert_type, 'all')}:{sample_size}"
+
 
 class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCreate, FraudAlertUpdate]):
     """
@@ -39,16 +368,22 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         severity: Optional[FraudAlertSeverity] = None,
         time_range: str = "30d",
         use_cache: bool = True
-    ) -> List[FraudAlert]:
-        """Get fraud alerts for a specific user with optional filtering."""
-        cache_key = f"user_fraud_alerts:{user_id}:{status}:{severity}:{time_range}"
+    ) -> List[Dict[str, Any]]:
+        """
+        Get fraud alerts for a specific user with optional filtering.
+
+        Alerts are returned, and cached, as ``FraudAlert.to_analysis_dict()``
+        dictionaries read straight from a column projection, so cache hits
+        never touch SQLAlchemy.
+        """
+        cache_key = _user_alerts_cache_key(user_id, status, severity, time_range)
         
         if use_cache:
             cached = await self.cache_manager.get(cache_key)
             if cached:
                 return cached
 
-        query = select(FraudAlert).where(FraudAlert.user_id == user_id)
+        query = select(*_ANALYSIS_COLUMNS).where(FraudAlert.user_id == user_id)
 
         if status:
             query = query.where(FraudAlert.status == status)
@@ -58,16 +393,17 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
 
         # Add time range filter
         if time_range:
-            start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+            start_date = _resolve_window(time_range)
             query = query.where(FraudAlert.created_at >= start_date)
 
         query = query.order_by(desc(FraudAlert.created_at))
 
         result = await self.db_session.execute(query)
-        alerts = result.scalars().all()
+        alerts = [_analysis_row(row) for row in result.mappings()]
 
         if use_cache:
             await self.cache_manager.set(cache_key, alerts, ttl=900)  # 15 minutes
+            await self.cache_manager.sadd(_user_alerts_tag(user_id), [cache_key], ttl=_TAG_TTL)
 
         return alerts
 
@@ -78,31 +414,32 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         status: Optional[FraudAlertStatus] = None,
         time_range: str = "30d",
         use_cache: bool = True
-    ) -> List[FraudAlert]:
-        """Get fraud alerts for a specific account."""
-        cache_key = f"account_fraud_alerts:{account_id}:{status}:{time_range}"
+    ) -> List[Dict[str, Any]]:
+        """Get fraud alerts for a specific account, as analysis dictionaries."""
+        cache_key = _account_alerts_cache_key(account_id, status, time_range)
         
         if use_cache:
             cached = await self.cache_manager.get(cache_key)
             if cached:
                 return cached
 
-        query = select(FraudAlert).where(FraudAlert.account_id == account_id)
+        query = select(*_ANALYSIS_COLUMNS).where(FraudAlert.account_id == account_id)
 
         if status:
             query = query.where(FraudAlert.status == status)
 
         if time_range:
-            start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+            start_date = _resolve_window(time_range)
             query = query.where(FraudAlert.created_at >= start_date)
 
         query = query.order_by(desc(FraudAlert.created_at))
 
         result = await self.db_session.execute(query)
-        alerts = result.scalars().all()
+        alerts = [_analysis_row(row) for row in result.mappings()]
 
         if use_cache:
             await self.cache_manager.set(cache_key, alerts, ttl=900)  # 15 minutes
+            await self.cache_manager.sadd(_account_alerts_tag(account_id), [cache_key], ttl=_TAG_TTL)
 
         return alerts
 
@@ -111,17 +448,22 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         user_id: int,
         time_range: str = "90d"
     ) -> Dict[str, Any]:
-        """Analyze fraud patterns for a user using AI."""
-        try:
-            # Get user's fraud alerts
-            alerts = await self.get_alerts_by_user(user_id, time_range=time_range)
+        """
+        Analyze fraud patterns for a user using AI.
 
-            # Get related transaction data
-            transaction_data = await self._get_user_transaction_data(user_id, time_range)
+        Concurrent calls with identical data share one model call through
+        ``analyze_with_ai``; the database reads stay on this request's session.
+        """
+        try:
+            # Alerts and transaction data are independent; only the alert read uses the session
+            alerts, transaction_data = await asyncio.gather(
+                self.get_alerts_by_user(user_id, time_range=time_range),
+                self._get_user_transaction_data(user_id, time_range)
+            )
 
             # Analyze patterns with AI
             pattern_data = {
-                "alerts": [alert.to_dict() for alert in alerts],
+                "alerts": alerts,
                 "transactions": transaction_data,
                 "user_id": user_id,
                 "time_range": time_range
@@ -134,8 +476,9 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             )
 
             # Cache the analysis
-            cache_key = f"fraud_pattern_analysis:{user_id}:{time_range}"
+            cache_key = _fraud_pattern_cache_key(user_id, time_range)
             await self.cache_manager.set(cache_key, analysis_result, ttl=3600)  # 1 hour
+            await self.cache_manager.sadd(_user_alerts_tag(user_id), [cache_key], ttl=_TAG_TTL)
 
             return analysis_result
 
@@ -200,15 +543,21 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         self,
         alert_id: Union[int, str, UUID]
     ) -> Dict[str, Any]:
-        """Analyze a fraud alert using AI."""
+        """
+        Analyze a fraud alert using AI.
+
+        Concurrent calls for the same alert (e.g. a polling UI) share one model
+        call through ``analyze_with_ai``; the database reads stay on this
+        request's session.
+        """
         try:
-            alert = await self.get_by_id(alert_id)
+            alert = await self._fetch_alert(alert_id)
             if not alert:
                 logger.error(f"Alert {alert_id} not found")
                 return {"error": f"Alert {alert_id} not found"}
 
-            # Get related data for analysis
-            alert_context = await self._get_alert_context_data(alert_id)
+            # Get related data for analysis, reusing the alert loaded above
+            alert_context = await self._get_alert_context_data(alert)
 
             # Analyze with AI
             analysis_result = await self.analyze_with_ai(
@@ -218,7 +567,7 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             )
 
             # Cache the analysis
-            cache_key = f"alert_ai_analysis:{alert_id}"
+            cache_key = _alert_analysis_cache_key(alert_id)
             await self.cache_manager.set(cache_key, analysis_result, ttl=1800)  # 30 minutes
 
             return analysis_result
@@ -233,7 +582,7 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     ) -> List[Dict[str, Any]]:
         """Find related alerts and correlate patterns."""
         try:
-            alert = await self.get_by_id(alert_id)
+            alert = await self._fetch_alert(alert_id)
             if not alert:
                 logger.error(f"Alert {alert_id} not found")
                 return []
@@ -243,8 +592,8 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
 
             # Analyze correlations with AI
             correlation_data = {
-                "primary_alert": alert.to_dict(),
-                "related_alerts": [a.to_dict() for a in related_alerts],
+                "primary_alert": alert.to_analysis_dict(),
+                "related_alerts": [a.to_analysis_dict() for a in related_alerts],
                 "correlation_metrics": await self._calculate_correlation_metrics(alert, related_alerts)
             }
 
@@ -263,29 +612,49 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     async def get_fraud_trends(
         self,
         time_range: str = "90d",
-        alert_type: Optional[FraudAlertType] = None
+        alert_type: Optional[FraudAlertType] = None,
+        sample_size: int = 500
     ) -> Dict[str, Any]:
-        """Get fraud trends and statistics."""
+        """
+        Get fraud trends and statistics.
+
+        The window is widened to whole days so totals can come from the daily
+        rollup, and the sample alerts are read over that same window. Only the
+        ``sample_size`` most recent alerts are loaded as examples for the
+        analysis, so memory stays bounded however busy the window was.
+        """
         try:
-            # Get alerts for the time range
-            start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+            cache_key = _fraud_trends_cache_key(time_range, alert_type, sample_size)
+            cached_trends = await self.cache_manager.get(cache_key)
+            if cached_trends is not None:
+                return cached_trends
+
+            # Get alerts for the time range, from the start of its first day
+            start_date = datetime.combine(_resolve_window(time_range).date(), time.min)
             
-            query = select(FraudAlert).where(FraudAlert.created_at >= start_date)
+            # Only the columns the analysis reads, as plain rows; no ORM hydration
+            query = select(*_ANALYSIS_COLUMNS).where(FraudAlert.created_at >= start_date)
             
             if alert_type:
                 query = query.where(FraudAlert.alert_type == alert_type)
 
-            result = await self.db_session.execute(query)
-            alerts = result.scalars().all()
+            query = query.order_by(desc(FraudAlert.created_at)).limit(sample_size)
+
+            # Streamed in batches rather than buffered in full by the driver
+            result = await self.db_session.stream(query.execution_options(yield_per=_STREAM_BATCH_SIZE))
+            alerts = [_analysis_row(row) async for row in result.mappings()]
+
+            # Counts come from the pre-aggregated daily rollup where it exists
+            aggregates = await self._aggregate_daily_alerts(start_date, alert_type)
 
             # Analyze trends with AI
             trend_data = {
-                "alerts": [alert.to_dict() for alert in alerts],
+                "alerts": alerts,
                 "time_range": time_range,
                 "alert_type": alert_type,
-                "total_alerts": len(alerts),
-                "severity_distribution": await self._calculate_severity_distribution(alerts),
-                "type_distribution": await self._calculate_type_distribution(alerts)
+                "total_alerts": aggregates["total_alerts"],
+                "severity_distribution": aggregates["severity_distribution"],
+                "type_distribution": aggregates["type_distribution"]
             }
 
             trend_analysis = await self.analyze_with_ai(
@@ -294,6 +663,10 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
                 TaskComplexity.MEDIUM
             )
 
+            # Trends are shared by every dashboard; don't cache failed analyses
+            if trend_analysis:
+                await self.cache_manager.set(cache_key, trend_analysis, ttl=3600)  # 1 hour
+
             return trend_analysis
 
         except Exception as e:
@@ -302,31 +675,57 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
 
     async def prioritize_alerts(
         self,
-        alert_ids: List[Union[int, str, UUID]]
+        alert_ids: List[Union[int, str, UUID]],
+        max_concurrency: int = 16
     ) -> List[Dict[str, Any]]:
-        """Prioritize alerts using AI analysis."""
+        """
+        Prioritize alerts using AI analysis.
+
+        Alerts are read in one query per ``_ID_CHUNK_SIZE`` IDs, and their
+        analyses run concurrently, at most ``max_concurrency`` orchestrator
+        calls at a time; unknown IDs are skipped.
+        """
         try:
-            prioritized_alerts = []
-
-            for alert_id in alert_ids:
-                alert = await self.get_by_id(alert_id)
-                if not alert:
-                    continue
-
-                # Analyze alert priority
-                priority_analysis = await self.analyze_with_ai(
-                    alert.to_dict(),
-                    TaskType.RISK_ASSESSMENT,
-                    TaskComplexity.MEDIUM
+            if not alert_ids:
+                return []
+
+            # Project the prioritization columns instead of hydrating and
+            # serializing full alerts with to_dict(), one query per ID chunk
+            alerts = []
+            for start in range(0, len(alert_ids), _ID_CHUNK_SIZE):
+                query = select(*_PRIORITY_COLUMNS).where(
+                    FraudAlert.alert_id.in_(alert_ids[start:start + _ID_CHUNK_SIZE])
+                )
+                result = await self.db_session.execute(query)
+                alerts.extend(
+                    {
+                        **_analysis_row(row),
+                        "title": row["title"],
+                        "description": row["description"],
+                        "confidence": row["confidence"],
+                        "financial_impact": row["financial_impact"],
+                        "requires_customer_contact": row["requires_customer_contact"]
+                    }
+                    for row in result.mappings()
                 )
 
-                prioritized_alerts.append({
-                    "alert_id": str(alert_id),
+            priority_analyses = await self.analyze_with_ai_batch(
+                alerts,
+                TaskType.RISK_ASSESSMENT,
+                TaskComplexity.MEDIUM,
+                max_concurrency=max_concurrency
+            )
+
+            prioritized_alerts = [
+                {
+                    "alert_id": str(alert["alert_id"]),
                     "priority_score": priority_analysis.get("priority_score", 0.0),
                     "urgency_level": priority_analysis.get("urgency_level", "medium"),
                     "recommended_actions": priority_analysis.get("recommended_actions", []),
                     "risk_factors": priority_analysis.get("risk_factors", [])
-                })
+                }
+                for alert, priority_analysis in zip(alerts, priority_analyses)
+            ]
 
             # Sort by priority score
             prioritized_alerts.sort(key=lambda x: x["priority_score"], reverse=True)
@@ -357,11 +756,18 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             if notes:
                 update_data["investigation_notes"] = notes
 
-            # Update alerts
-            updated_count = await self.bulk_update(
-                {"alert_id": {"$in": alert_ids}},
-                update_data
-            )
+            # One UPDATE ... WHERE alert_id IN (...) per chunk, all in one transaction
+            updated_count = 0
+            async with self._write_transaction():
+                for start in range(0, len(alert_ids), _ID_CHUNK_SIZE):
+                    query = (
+                        update(FraudAlert)
+                        .where(FraudAlert.alert_id.in_(alert_ids[start:start + _ID_CHUNK_SIZE]))
+                        .values(**update_data)
+                        .execution_options(synchronize_session=False)
+                    )
+                    result = await self.db_session.execute(query)
+                    updated_count += result.rowcount
 
             # Invalidate related caches
             await self._invalidate_alert_caches(alert_ids)
@@ -376,11 +782,17 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     async def get_high_risk_alerts(
         self,
         risk_threshold: float = 0.7,
-        time_range: str = "7d"
+        time_range: str = "7d",
+        limit: int = 500
     ) -> List[FraudAlert]:
-        """Get high-risk fraud alerts."""
+        """
+        Get high-risk fraud alerts, highest risk first, at most ``limit`` of them.
+
+        Served by the ix_fraud_high_risk partial index, so the scan stops after
+        ``limit`` rows instead of sorting every open alert.
+        """
         try:
-            start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+            start_date = _resolve_window(time_range)
             
             query = select(FraudAlert).where(
                 and_(
@@ -388,9 +800,9 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
                     FraudAlert.created_at >= start_date,
                     FraudAlert.status.in_([FraudAlertStatus.ACTIVE, FraudAlertStatus.INVESTIGATING])
                 )
-            )
+            ).options(raiseload("*"))
 
-            query = query.order_by(desc(FraudAlert.risk_score))
+            query = query.order_by(desc(FraudAlert.risk_score)).limit(limit)
 
             result = await self.db_session.execute(query)
             high_risk_alerts = result.scalars().all()
@@ -407,40 +819,26 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     ) -> Dict[str, Any]:
         """Get comprehensive fraud statistics."""
         try:
-            start_date = datetime.utcnow() - timedelta(days=int(time_range[:-1]))
+            start_date = _resolve_window(time_range)
             
-            # Get all alerts in time range
-            query = select(FraudAlert).where(FraudAlert.created_at >= start_date)
-            result = await self.db_session.execute(query)
-            alerts = result.scalars().all()
-
-            # Calculate statistics
-            total_alerts = len(alerts)
-            confirmed_fraud = len([a for a in alerts if a.is_confirmed_fraud])
-            false_positives = len([a for a in alerts if a.is_false_positive])
-            pending_investigation = len([a for a in alerts if a.status == FraudAlertStatus.ACTIVE])
-
-            # Calculate average risk score
-            risk_scores = [a.risk_score for a in alerts if a.risk_score is not None]
-            avg_risk_score = sum(risk_scores) / len(risk_scores) if risk_scores else 0.0
+            # Aggregate in the database instead of loading every alert in the window
+            aggregates = await self._aggregate_alerts(start_date)
 
-            # Get severity distribution
-            severity_distribution = await self._calculate_severity_distribution(alerts)
-
-            # Get type distribution
-            type_distribution = await self._calculate_type_distribution(alerts)
+            total_alerts = aggregates["total_alerts"]
+            confirmed_fraud = aggregates["confirmed_fraud"]
+            false_positives = aggregates["false_positives"]
 
             statistics = {
                 "time_range": time_range,
                 "total_alerts": total_alerts,
                 "confirmed_fraud": confirmed_fraud,
                 "false_positives": false_positives,
-                "pending_investigation": pending_investigation,
-                "average_risk_score": avg_risk_score,
+                "pending_investigation": aggregates["pending_investigation"],
+                "average_risk_score": aggregates["average_risk_score"],
                 "fraud_rate": (confirmed_fraud / total_alerts * 100) if total_alerts > 0 else 0.0,
                 "false_positive_rate": (false_positives / total_alerts * 100) if total_alerts > 0 else 0.0,
-                "severity_distribution": severity_distribution,
-                "type_distribution": type_distribution
+                "severity_distribution": aggregates["severity_distribution"],
+                "type_distribution": aggregates["type_distribution"]
             }
 
             return statistics
@@ -459,21 +857,24 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     ) -> Dict[str, Any]:
         """Get user data for fraud analysis."""
         try:
-            # Get user's fraud alerts
-            alerts = await self.get_alerts_by_user(user_id, time_range=time_range or "30d")
-            
-            # Get user's transaction data
-            transaction_data = await self._get_user_transaction_data(user_id, time_range or "30d")
+            # Alert risk data and transaction data are independent; only the
+            # risk data read uses the session
+            risk_data, transaction_data = await asyncio.gather(
+                self._get_user_risk_data(user_id, time_range or "30d"),
+                self._get_user_transaction_data(user_id, time_range or "30d")
+            )
+            if "error" in risk_data:
+                return {"user_id": user_id, "error": risk_data["error"]}
 
             return {
                 "user_id": user_id,
                 "data_type": data_type,
                 "time_range": time_range,
-                "fraud_alerts": [alert.to_dict() for alert in alerts],
+                "fraud_alerts": risk_data["alerts"],
                 "transactions": transaction_data,
-                "total_alerts": len(alerts),
-                "confirmed_fraud": len([a for a in alerts if a.is_confirmed_fraud]),
-                "false_positives": len([a for a in alerts if a.is_false_positive])
+                "total_alerts": risk_data["total_alerts"],
+                "confirmed_fraud": risk_data["confirmed_fraud"],
+                "false_positives": risk_data["false_positives"]
             }
 
         except Exception as e:
@@ -504,33 +905,43 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             logger.error(f"Failed to get user transactions: {str(e)}")
             return []
 
-    async def _get_user_risk_data(self, user_id: int) -> Dict[str, Any]:
-        """Get user's fraud risk data."""
+    async def _get_user_risk_data(self, user_id: int, time_range: str = "90d") -> Dict[str, Any]:
+        """
+        Get user's fraud risk data.
+
+        The summary is cached and tagged with the user's alerts, so risk
+        assessments and analysis payloads share it until an alert changes.
+        """
         try:
+            cache_key = _user_risk_cache_key(user_id, time_range)
+            cached_risk = await self.cache_manager.get(cache_key)
+            if cached_risk is not None:
+                return cached_risk
+
             # Get user's fraud alerts
-            alerts = await self.get_alerts_by_user(user_id, time_range="90d")
+            alerts = await self.get_alerts_by_user(user_id, time_range=time_range)
             
-            # Calculate risk metrics
-            total_alerts = len(alerts)
-            confirmed_fraud = len([a for a in alerts if a.is_confirmed_fraud])
-            false_positives = len([a for a in alerts if a.is_false_positive])
-            high_risk_alerts = len([a for a in alerts if a.severity in [FraudAlertSeverity.HIGH, FraudAlertSeverity.CRITICAL]])
-
-            # Calculate average risk score
-            risk_scores = [a.risk_score for a in alerts if a.risk_score is not None]
-            avg_risk_score = sum(risk_scores) / len(risk_scores) if risk_scores else 0.0
+            # Calculate risk metrics in one pass
+            summary = _summarize_alerts(alerts)
+            total_alerts = summary["total_alerts"]
+            confirmed_fraud = summary["confirmed_fraud"]
 
-            return {
+            risk_data = {
                 "user_id": user_id,
                 "total_alerts": total_alerts,
                 "confirmed_fraud": confirmed_fraud,
-                "false_positives": false_positives,
-                "high_risk_alerts": high_risk_alerts,
-                "average_risk_score": avg_risk_score,
+                "false_positives": summary["false_positives"],
+                "high_risk_alerts": summary["high_risk_alerts"],
+                "average_risk_score": summary["average_risk_score"],
                 "fraud_rate": (confirmed_fraud / total_alerts * 100) if total_alerts > 0 else 0.0,
-                "alerts": [alert.to_dict() for alert in alerts]
+                "alerts": alerts
             }
 
+            await self.cache_manager.set(cache_key, risk_data, ttl=900)  # 15 minutes
+            await self.cache_manager.sadd(_user_alerts_tag(user_id), [cache_key], ttl=_TAG_TTL)
+
+            return risk_data
+
         except Exception as e:
             logger.error(f"Failed to get user risk data: {str(e)}")
             return {"user_id": user_id, "error": str(e)}
@@ -540,136 +951,21 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze spending patterns for fraud detection."""
-        try:
-            if not transactions:
-                return {"patterns": [], "fraud_indicators": []}
-
-            # Calculate basic metrics
-            total_amount = sum(t.get("amount", 0) for t in transactions)
-            transaction_count = len(transactions)
-            
-            # Group by category and location
-            category_patterns = {}
-            location_patterns = {}
-            
-            for transaction in transactions:
-                category = transaction.get("category", "unknown")
-                location = transaction.get("location", "unknown")
-                amount = transaction.get("amount", 0)
-                
-                category_patterns[category] = category_patterns.get(category, 0) + amount
-                location_patterns[location] = location_patterns.get(location, 0) + amount
-
-            # Detect potential fraud indicators
-            fraud_indicators = []
-            
-            # Check for unusual amounts
-            if total_amount > 10000:  # High amount threshold
-                fraud_indicators.append("high_transaction_amount")
-            
-            # Check for unusual locations
-            if len(location_patterns) > 10:  # Many different locations
-                fraud_indicators.append("multiple_locations")
-
-            return {
-                "patterns": {
-                    "total_amount": total_amount,
-                    "transaction_count": transaction_count,
-                    "average_transaction": total_amount / transaction_count if transaction_count > 0 else 0,
-                    "category_patterns": category_patterns,
-                    "location_patterns": location_patterns
-                },
-                "fraud_indicators": fraud_indicators
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze spending patterns: {str(e)}")
-            return {"patterns": [], "fraud_indicators": [], "error": str(e)}
+        return await _run_analyzer(_spending_patterns, transactions)
 
     async def _analyze_temporal_patterns(
         self,
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze temporal patterns for fraud detection."""
-        try:
-            if not transactions:
-                return {"temporal_patterns": [], "fraud_indicators": []}
-
-            # Group by hour and day
-            hourly_patterns = {}
-            daily_patterns = {}
-            
-            for transaction in transactions:
-                timestamp = transaction.get("timestamp")
-                if timestamp:
-                    hour = timestamp.hour
-                    day = timestamp.strftime("%A")
-                    
-                    hourly_patterns[hour] = hourly_patterns.get(hour, 0) + 1
-                    daily_patterns[day] = daily_patterns.get(day, 0) + 1
-
-            # Detect temporal fraud indicators
-            fraud_indicators = []
-            
-            # Check for unusual hours (late night transactions)
-            late_night_transactions = sum(hourly_patterns.get(hour, 0) for hour in [22, 23, 0, 1, 2, 3, 4, 5])
-            if late_night_transactions > len(transactions) * 0.3:  # More than 30% at night
-                fraud_indicators.append("unusual_timing")
-
-            return {
-                "temporal_patterns": {
-                    "hourly_distribution": hourly_patterns,
-                    "daily_distribution": daily_patterns,
-                    "late_night_transactions": late_night_transactions
-                },
-                "fraud_indicators": fraud_indicators
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze temporal patterns: {str(e)}")
-            return {"temporal_patterns": [], "fraud_indicators": [], "error": str(e)}
+        return await _run_analyzer(_temporal_patterns, transactions)
 
     async def _analyze_geographic_patterns(
         self,
         transactions: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Analyze geographic patterns for fraud detection."""
-        try:
-            if not transactions:
-                return {"geographic_patterns": [], "fraud_indicators": []}
-
-            # Group by location
-            location_patterns = {}
-            
-            for transaction in transactions:
-                location = transaction.get("location", "unknown")
-                amount = transaction.get("amount", 0)
-                location_patterns[location] = location_patterns.get(location, 0) + amount
-
-            # Detect geographic fraud indicators
-            fraud_indicators = []
-            
-            # Check for multiple locations
-            if len(location_patterns) > 5:  # Many different locations
-                fraud_indicators.append("multiple_locations")
-            
-            # Check for unusual locations
-            unusual_locations = [loc for loc in location_patterns.keys() if "unknown" in loc.lower()]
-            if unusual_locations:
-                fraud_indicators.append("unusual_locations")
-
-            return {
-                "geographic_patterns": {
-                    "location_breakdown": location_patterns,
-                    "total_locations": len(location_patterns),
-                    "unusual_locations": unusual_locations
-                },
-                "fraud_indicators": fraud_indicators
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to analyze geographic patterns: {str(e)}")
-            return {"geographic_patterns": [], "fraud_indicators": [], "error": str(e)}
+        return await _run_analyzer(_geographic_patterns, transactions)
 
     async def _perform_risk_analysis(
         self,
@@ -680,11 +976,12 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         try:
             alerts = user_data.get("fraud_alerts", [])
             
-            # Calculate risk metrics
-            total_alerts = len(alerts)
-            confirmed_fraud = len([a for a in alerts if a.get("is_confirmed_fraud", False)])
-            false_positives = len([a for a in alerts if a.get("is_false_positive", False)])
-            high_risk_alerts = len([a for a in alerts if a.get("severity") in ["high", "critical"]])
+            # Calculate risk metrics in one pass
+            summary = _summarize_alerts(alerts)
+            total_alerts = summary["total_alerts"]
+            confirmed_fraud = summary["confirmed_fraud"]
+            false_positives = summary["false_positives"]
+            high_risk_alerts = summary["high_risk_alerts"]
 
             # Calculate risk score
             risk_score = 0.0
@@ -729,9 +1026,11 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
     ) -> List[Dict[str, Any]]:
         """Get user activity data for fraud analysis."""
         try:
-            # Get user's transactions and alerts
-            transactions = await self._get_user_transaction_data(user_id, time_range)
-            alerts = await self.get_alerts_by_user(user_id, time_range=time_range)
+            # Get user's transactions and alerts concurrently; only the alert read uses the session
+            transactions, alerts = await asyncio.gather(
+                self._get_user_transaction_data(user_id, time_range),
+                self.get_alerts_by_user(user_id, time_range=time_range)
+            )
 
             # Combine into activity data
             activity_data = []
@@ -748,8 +1047,8 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             for alert in alerts:
                 activity_data.append({
                     "type": "alert",
-                    "data": alert.to_dict(),
-                    "timestamp": alert.created_at
+                    "data": alert,
+                    "timestamp": alert["created_at"]
                 })
 
             return activity_data
@@ -763,7 +1062,12 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
         user_id: int,
         time_range: str
     ) -> List[Dict[str, Any]]:
-        """Get user's transaction data."""
+        """
+        Get user's transaction data.
+
+        Callers gather this with a session query; once it reads the database it
+        must use its own session, since an AsyncSession runs one query at a time.
+        """
         try:
             # This would typically query the transaction repository
             # For now, return mock data
@@ -782,23 +1086,29 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             logger.error(f"Failed to get user transaction data: {str(e)}")
             return []
 
-    async def _get_alert_context_data(
-        self,
-        alert_id: Union[int, str, UUID]
-    ) -> Dict[str, Any]:
-        """Get context data for alert analysis."""
-        try:
-            alert = await self.get_by_id(alert_id)
-            if not alert:
-                return {"error": "Alert not found"}
+    async def _fetch_alert(self, alert_id: Union[int, str, UUID]) -> Optional[FraudAlert]:
+        """
+        Load a single alert for analysis.
 
-            # Get related data
-            related_alerts = await self._get_related_alerts(alert)
-            user_transactions = await self._get_user_transaction_data(alert.user_id, "30d")
+        Analysis only reads the alert's own columns, so relationships are set to
+        raise instead of lazy-loading one query per access.
+        """
+        query = select(FraudAlert).where(FraudAlert.alert_id == alert_id).options(raiseload("*"))
+        result = await self.db_session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def _get_alert_context_data(self, alert: FraudAlert) -> Dict[str, Any]:
+        """Get context data for analysis of an already loaded alert."""
+        try:
+            # Get related data concurrently; only the related-alert read uses the session
+            related_alerts, user_transactions = await asyncio.gather(
+                self._get_related_alerts(alert),
+                self._get_user_transaction_data(alert.user_id, "30d")
+            )
 
             return {
                 "alert": alert.to_dict(),
-                "related_alerts": [a.to_dict() for a in related_alerts],
+                "related_alerts": [a.to_analysis_dict() for a in related_alerts],
                 "user_transactions": user_transactions,
                 "user_id": alert.user_id,
                 "account_id": alert.account_id
@@ -823,7 +1133,7 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
                     FraudAlert.alert_id != alert.alert_id,
                     FraudAlert.created_at >= time_window
                 )
-            )
+            ).options(raiseload("*"))
 
             result = await self.db_session.execute(query)
             related_alerts = result.scalars().all()
@@ -878,61 +1188,114 @@ class EnhancedFraudAlertRepository(AIEnhancedRepository[FraudAlert, FraudAlertCr
             logger.error(f"Failed to calculate correlation metrics: {str(e)}")
             return {"correlation_score": 0.0, "shared_indicators": [], "error": str(e)}
 
-    async def _calculate_severity_distribution(
+    async def _aggregate_alerts(
         self,
-        alerts: List[FraudAlert]
-    ) -> Dict[str, int]:
-        """Calculate severity distribution for alerts."""
-        try:
-            distribution = {
-                "low": 0,
-                "medium": 0,
-                "high": 0,
-                "critical": 0
-            }
-
-            for alert in alerts:
-                severity = alert.severity.value if alert.severity else "unknown"
-                distribution[severity] = distribution.get(severity, 0) + 1
-
-            return distribution
+        start_date: datetime,
+        alert_type: Optional[FraudAlertType] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate alert statistics created since ``start_date`` in one grouped query.
+
+        Rows are grouped by (severity, alert_type), which is a small, bounded set,
+        and folded into totals and both distributions here.
+        """
+        query = select(
+            FraudAlert.severity,
+            FraudAlert.alert_type,
+            func.count().label("total"),
+            func.sum(case((FraudAlert.is_confirmed_fraud == True, 1), else_=0)).label("confirmed"),  # noqa: E712
+            func.sum(case((FraudAlert.is_false_positive == True, 1), else_=0)).label("false_positives"),  # noqa: E712
+            func.sum(case((FraudAlert.status == FraudAlertStatus.ACTIVE, 1), else_=0)).label("pending"),
+            func.sum(FraudAlert.risk_score).label("risk_sum"),
+            func.count(FraudAlert.risk_score).label("risk_count")
+        ).where(FraudAlert.created_at >= start_date)
+
+        if alert_type:
+            query = query.where(FraudAlert.alert_type == alert_type)
+
+        query = query.group_by(FraudAlert.severity, FraudAlert.alert_type)
+        result = await self.db_session.execute(query)
 
-        except Exception as e:
-            logger.error(f"Failed to calculate severity distribution: {str(e)}")
-            return {"low": 0, "medium": 0, "high": 0, "critical": 0}
+        return _fold_alert_aggregates(result)
 
-    async def _calculate_type_distribution(
+    async def _aggregate_daily_alerts(
         self,
-        alerts: List[FraudAlert]
-    ) -> Dict[str, int]:
-        """Calculate alert type distribution."""
-        try:
-            distribution = {}
-
-            for alert in alerts:
-                alert_type = alert.alert_type.value if alert.alert_type else "unknown"
-                distribution[alert_type] = distribution.get(alert_type, 0) + 1
+        start_date: datetime,
+        alert_type: Optional[FraudAlertType] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate alert statistics from the ``fraud_alert_daily`` rollup.
+
+        Same result shape as ``_aggregate_alerts``, but scans one row per day,
+        type and severity instead of every alert; whole days are counted from
+        the day of ``start_date``. The rollup is an indexed view kept current by
+        SQL Server; where it does not exist, fraud_alerts is aggregated instead.
+        """
+        global _daily_rollup_missing
+        if _daily_rollup_missing:
+            return await self._aggregate_alerts(start_date, alert_type)
+
+        daily = fraud_alert_daily.c
+        query = select(
+            daily.severity,
+            daily.alert_type,
+            func.sum(daily.alert_count).label("total"),
+            func.sum(daily.confirmed).label("confirmed"),
+            func.sum(daily.false_positives).label("false_positives"),
+            func.sum(daily.pending).label("pending"),
+            func.sum(daily.risk_sum).label("risk_sum"),
+            func.sum(daily.risk_count).label("risk_count")
+        ).where(daily.day >= start_date.date())
+
+        if alert_type:
+            query = query.where(daily.alert_type == alert_type)
+
+        query = query.group_by(daily.severity, daily.alert_type)
 
-            return distribution
+        try:
+            # Savepoint, so a missing view does not abort the caller's transaction
+            async with self.db_session.begin_nested():
+                result = await self.db_session.execute(query)
+                rows = result.all()
+        except ProgrammingError as e:
+            _daily_rollup_missing = True
+            logger.warning(f"fraud_alert_daily unavailable, aggregating fraud_alerts instead: {str(e)}")
+            return await self._aggregate_alerts(start_date, alert_type)
 
-        except Exception as e:
-            logger.error(f"Failed to calculate type distribution: {str(e)}")
-            return {}
+        return _fold_alert_aggregates(rows)
 
     async def _invalidate_alert_caches(self, alert_ids: List[Union[int, str, UUID]]) -> None:
-        """Invalidate caches related to specific alerts."""
+        """
+        Invalidate caches related to specific alerts.
+
+        The alerts' owners are read in one query; every cached list and pattern
+        analysis for those users and accounts is found through their tag sets,
+        and all keys are deleted in one call.
+        """
         try:
-            for alert_id in alert_ids:
-                cache_patterns = [
-                    f"alert_ai_analysis:{alert_id}",
-                    f"user_fraud_alerts:*",
-                    f"account_fraud_alerts:*",
-                    f"fraud_pattern_analysis:*"
-                ]
-                
-                # Clear related caches
-                for pattern in cache_patterns:
-                    await self.cache_manager.delete(pattern)
+            if not alert_ids:
+                return
+
+            tags = set()
+            for start in range(0, len(alert_ids), _ID_CHUNK_SIZE):
+                query = (
+                    select(FraudAlert.user_id, FraudAlert.account_id)
+                    .where(FraudAlert.alert_id.in_(alert_ids[start:start + _ID_CHUNK_SIZE]))
+                    .distinct()
+                )
+                result = await self.db_session.execute(query)
+
+                for user_id, account_id in result:
+                    tags.add(_user_alerts_tag(user_id))
+                    if account_id is not None:
+                        tags.add(_account_alerts_tag(account_id))
+
+            tagged_keys = await self.cache_manager.sunion(list(tags))
+            await self.cache_manager.delete_many([
+                *tagged_keys,
+                *tags,
+                *map(_alert_analysis_cache_key, alert_ids)
+            ])
 
         except Exception as e:
             logger.error(f"Failed to invalidate alert caches: {str(e)}") 
\ No newline at end of file
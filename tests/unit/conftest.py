@@ -0,0 +1,71 @@
+"""
+Shared fixtures for repository query-count tests.
+
+Test modules provide a ``rows`` fixture with their model-specific row fakes
+(and optionally ``projected_rows`` for column-projection queries) plus a
+``repository`` fixture built from ``session`` and ``llm_orchestrator``.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+class _Scalars(list):
+    def all(self):
+        return self
+
+
+class _Result:
+    """Result stand-in serving entity rows, their mappings, or projected rows."""
+
+    def __init__(self, rows, projected_rows):
+        self._rows = rows
+        self._projected_rows = projected_rows
+
+    def scalars(self):
+        return _Scalars(self._rows)
+
+    def mappings(self):
+        return [vars(row) for row in self._rows]
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+    def __iter__(self):
+        return iter(self._projected_rows)
+
+
+class QueryCountingSession:
+    """Stand-in AsyncSession that records every statement executed through it."""
+
+    def __init__(self, rows, projected_rows=()):
+        self.statements = []
+        self._rows = rows
+        self._projected_rows = projected_rows
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return _Result(self._rows, self._projected_rows)
+
+
+@pytest.fixture
+def projected_rows():
+    return []
+
+
+@pytest.fixture
+def session(rows, projected_rows):
+    return QueryCountingSession(rows, projected_rows)
+
+
+@pytest.fixture
+def llm_orchestrator():
+    # A parseable high-risk answer, so analyses reach their result-building code
+    orchestrator = MagicMock()
+    orchestrator.process_request = AsyncMock(
+        return_value=SimpleNamespace(content=json.dumps({"risk_score": 0.9, "anomalies": []}))
+    )
+    return orchestrator
@@ -0,0 +1,99 @@
+"""
+Query-count guards for the behavioral pattern repository.
+
+The repository is built through the behavioral endpoint's dependency, so the
+cached paths run against the same cache manager the API hands it.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.api.v1.endpoints.behavioral import get_behavioral_repository
+from app.core.llm_orchestrator import TaskType
+from app.models.behavioral_pattern import BehavioralPatternType
+from app.repositories.enhanced_base import CacheManager
+
+
+class _FakePattern:
+    """BehavioralPattern stand-in with the columns read by ``row_to_dict``."""
+
+    def __init__(self, pattern_id: int):
+        self.pattern_id = pattern_id
+        self.user_id = 1
+        self.pattern_type = BehavioralPatternType.SPENDING_HABIT
+        self.analysis_period_start = date.today() - timedelta(days=30)
+        self.analysis_period_end = date.today()
+        self.spending_categories = {"groceries": 0.4}
+        self.monthly_average_spending = 1200.0
+        self.spending_volatility = 0.2
+        self.seasonal_patterns = None
+        self.behavioral_biases = None
+        self.risk_indicators = None
+        self.spending_trends = None
+        self.unusual_patterns = None
+        self.confidence_score = 0.9
+        self.ai_insights = None
+        self.recommendations = None
+        self.next_analysis_date = date.today() + timedelta(days=7)
+        self.created_at = None
+        self.updated_at = None
+
+
+@pytest.fixture
+def rows():
+    return [_FakePattern(pattern_id) for pattern_id in range(1, 4)]
+
+
+async def _endpoint_repository(session, llm_orchestrator):
+    """Build the repository through the endpoint dependency, with a mocked orchestrator."""
+    repository = await get_behavioral_repository(db=session)
+    repository.llm_orchestrator = llm_orchestrator
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_endpoint_repository_uses_cache_manager(session, llm_orchestrator):
+    repository = await _endpoint_repository(session, llm_orchestrator)
+
+    assert isinstance(repository.cache_manager, CacheManager)
+
+
+@pytest.mark.asyncio
+async def test_get_patterns_as_dicts_is_served_from_cache(session, llm_orchestrator):
+    repository = await _endpoint_repository(session, llm_orchestrator)
+
+    first = await repository.get_patterns_as_dicts(1)
+    second = await repository.get_patterns_as_dicts(1)
+
+    assert [pattern["pattern_id"] for pattern in first] == [1, 2, 3]
+    assert second == first
+    assert len(session.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_ai_reuses_cached_response(session, llm_orchestrator):
+    repository = await _endpoint_repository(session, llm_orchestrator)
+    data = {"user_id": 1, "patterns": ["spending_habits"]}
+
+    first = await repository.analyze_with_ai(data, TaskType.BEHAVIORAL_ANALYSIS)
+    second = await repository.analyze_with_ai(data, TaskType.BEHAVIORAL_ANALYSIS)
+
+    assert first["risk_score"] == 0.9
+    assert second == first
+    assert llm_orchestrator.process_request.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_risk_assessment_uses_stored_pattern_metrics(session, llm_orchestrator):
+    repository = await _endpoint_repository(session, llm_orchestrator)
+
+    assessment = await repository.get_risk_assessment(1)
+
+    # Three high-confidence spending patterns trip none of the risk rules
+    assert assessment["risk_score"] == 0.0
+    assert assessment["risk_factors"] == []
+    [request] = [call.args[0] for call in llm_orchestrator.process_request.await_args_list]
+    assert request.context["total_patterns"] == 3
+    assert request.context["high_confidence_patterns"] == 3
+    assert "fraud_alerts" not in request.context
@@ -0,0 +1,161 @@
+"""
+Query-count guards for the card repository.
+
+Each public method is run against a session that records every statement it
+executes, so a lazy relationship load or a per-card query added inside a loop
+shows up as an exceeded bound instead of a silent N+1. Repository methods log
+and swallow their errors, so every test also checks the returned payload.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql.elements import Over
+
+from app.models.card import Card, CardStatus
+from app.models.transaction import TransactionCategory, TransactionStatus
+from app.repositories.enhanced_base import CacheManager
+from app.repositories.enhanced_card import EnhancedCardRepository, _FRAUD_TRANSACTION_LIMIT
+
+
+class _FakeCard:
+    """Row stand-in exposing the columns the repository reads."""
+
+    def __init__(self, card_id: int):
+        self.id = card_id
+        self.user_id = 1
+        self.account_id = 1
+        self.status = CardStatus.ACTIVE
+        self.last_used = None
+        self.expiry_date = datetime.utcnow() + timedelta(days=365)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "account_id": self.account_id,
+            "status": self.status,
+            "last_used": self.last_used,
+            "expiry_date": self.expiry_date,
+        }
+
+
+def _transaction_row(transaction_id: int, card_id: int, amount: float):
+    """A projected transaction row as returned by the batched transaction query."""
+    return SimpleNamespace(
+        id=transaction_id,
+        card_id=card_id,
+        amount=amount,
+        category=TransactionCategory.SHOPPING,
+        transaction_date=datetime.utcnow() - timedelta(days=1),
+        location={"address": "New York"},
+        status=TransactionStatus.COMPLETED,
+    )
+
+
+# Card 1 has two transactions and card 2 one; card 99 is never requested
+_TRANSACTION_ROWS = [
+    _transaction_row(1, 1, 10.0),
+    _transaction_row(2, 1, 15.0),
+    _transaction_row(3, 2, 40.0),
+    _transaction_row(4, 99, 5.0),
+]
+
+
+def _ranking_window(statement):
+    """
+    The window function a per-card bounded transaction query ranks rows by.
+
+    The statement is inspected rather than compiled, since compiling ORM
+    columns configures every mapper in the registry.
+    """
+    ranked = statement.selected_columns["card_id"].table
+    return ranked.element.selected_columns["row_number"].element
+
+
+@pytest.fixture
+def rows():
+    return [_FakeCard(card_id) for card_id in range(1, 8)]
+
+
+@pytest.fixture
+def projected_rows():
+    return _TRANSACTION_ROWS
+
+
+@pytest.fixture
+def repository(session, llm_orchestrator):
+    return EnhancedCardRepository(Card, session, llm_orchestrator, CacheManager())
+
+
+@pytest.mark.asyncio
+async def test_get_cards_by_user_issues_one_query_then_hits_cache(repository, session):
+    first = await repository.get_cards_by_user(1)
+    second = await repository.get_cards_by_user(1)
+    assert len(session.statements) == 1
+    assert [card["id"] for card in first] == list(range(1, 8))
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_user_risk_data_does_not_query_per_card(repository, session):
+    risk_data = await repository._get_user_risk_data(1)
+    # Cards, then one transaction read for every analyzed card
+    assert len(session.statements) <= 2
+    assert "error" not in risk_data
+    assert risk_data["total_cards"] == 7
+    assert risk_data["average_fraud_risk_score"] == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_user_card_data_does_not_query_per_card(repository, session):
+    card_data = await repository._get_user_card_data(1)
+    assert len(session.statements) <= 2
+    assert "error" not in card_data
+    transaction_counts = {
+        usage["card_info"]["id"]: usage["usage_metrics"]["total_transactions"]
+        for usage in card_data["card_usage_data"]
+    }
+    assert transaction_counts == {1: 2, 2: 1, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0}
+
+
+@pytest.mark.asyncio
+async def test_suspicious_cards_does_not_query_per_card(repository, session):
+    suspicious_cards = await repository.get_suspicious_cards()
+    # Active cards, then one transaction read for every uncached card
+    assert len(session.statements) <= 2
+    assert [card["card_id"] for card in suspicious_cards] == [str(card_id) for card_id in range(1, 8)]
+
+
+@pytest.mark.asyncio
+async def test_transaction_batch_groups_rows_by_card(repository, session):
+    transactions = await repository._get_cards_transaction_data_batch([1, 2, 3], "30d")
+    assert len(session.statements) == 1
+    assert list(transactions) == [1, 2, 3]
+    assert [t["id"] for t in transactions[1]] == ["1", "2"]
+    assert [t["id"] for t in transactions[2]] == ["3"]
+    assert transactions[3] == []
+
+
+@pytest.mark.asyncio
+async def test_transaction_batch_matches_string_card_ids(repository):
+    transactions = await repository._get_card_transaction_data("1", "30d")
+    assert [t["amount"] for t in transactions] == [10.0, 15.0]
+
+
+@pytest.mark.asyncio
+async def test_fraud_analyses_bound_transactions_per_card(repository, session):
+    await repository.get_suspicious_cards()
+    fraud_result = await repository.detect_card_fraud("1")
+    assert fraud_result["fraud_risk_score"] == pytest.approx(0.9)
+    # Batched and single-card transaction reads both rank rows per card
+    transaction_queries = session.statements[1:]
+    assert len(transaction_queries) == 2
+    for query in transaction_queries:
+        window = _ranking_window(query)
+        assert isinstance(window, Over)
+        assert window.element.name == "row_number"
+        assert [column.key for column in window.partition_by] == ["card_id"]
+        assert query.whereclause.left.key == "row_number"
+        assert query.whereclause.right.value == _FRAUD_TRANSACTION_LIMIT
@@ -0,0 +1,128 @@
+"""
+Query-count guards for the fraud alert repository.
+
+Analyses run against a session that records every statement it executes, so
+re-reading an alert or adding a per-alert query shows up as an exceeded bound.
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.fraud_alert import FraudAlert, FraudAlertSeverity, FraudAlertStatus, FraudAlertType
+from app.repositories.enhanced_base import CacheManager
+from app.repositories.enhanced_fraud_alert import EnhancedFraudAlertRepository
+
+
+class _FakeAlert:
+    """FraudAlert stand-in with the analysis and prioritization columns."""
+
+    def __init__(self, alert_id: int):
+        self.alert_id = alert_id
+        self.user_id = 1
+        self.account_id = 1
+        self.alert_type = FraudAlertType.VELOCITY_CHECK
+        self.severity = FraudAlertSeverity.HIGH
+        self.status = FraudAlertStatus.ACTIVE
+        self.risk_score = 0.8
+        self.is_confirmed_fraud = False
+        self.is_false_positive = False
+        self.created_at = datetime.utcnow()
+        self.title = "Velocity check"
+        self.description = None
+        self.confidence = 0.9
+        self.financial_impact = 0.0
+        self.requires_customer_contact = False
+
+    def to_dict(self):
+        return {
+            "alert_id": self.alert_id,
+            "alert_type": self.alert_type.value,
+            "risk_score": self.risk_score,
+        }
+
+    def to_analysis_dict(self):
+        return self.to_dict()
+
+
+@pytest.fixture
+def rows():
+    return [_FakeAlert(alert_id) for alert_id in range(1, 6)]
+
+
+# One answer carrying the fields every analysis under test reads
+_ANALYSIS_RESPONSE = {
+    "risk_score": 0.9,
+    "correlations": [{"alert_id": 2, "correlation": "same_alert_type"}],
+    "priority_score": 0.7,
+    "urgency_level": "high",
+    "recommended_actions": ["contact_customer"],
+    "risk_factors": ["velocity"],
+}
+
+
+@pytest.fixture
+def llm_orchestrator():
+    orchestrator = MagicMock()
+    orchestrator.process_request = AsyncMock(
+        return_value=SimpleNamespace(content=json.dumps(_ANALYSIS_RESPONSE))
+    )
+    return orchestrator
+
+
+def _request_contexts(llm_orchestrator):
+    """Payloads sent to the orchestrator, in call order."""
+    return [call.args[0].context for call in llm_orchestrator.process_request.await_args_list]
+
+
+@pytest.fixture
+def repository(session, llm_orchestrator):
+    return EnhancedFraudAlertRepository(FraudAlert, session, llm_orchestrator, CacheManager())
+
+
+@pytest.mark.asyncio
+async def test_analyze_alert_with_ai_reads_alert_once(repository, session, llm_orchestrator):
+    analysis = await repository.analyze_alert_with_ai(1)
+    # The alert, then its related alerts
+    assert len(session.statements) <= 2
+    assert "error" not in analysis
+    assert analysis["risk_score"] == 0.9
+    assert llm_orchestrator.process_request.await_count == 1
+    [context] = _request_contexts(llm_orchestrator)
+    assert context["alert"]["alert_id"] == 1
+    assert context["user_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_correlate_alerts_does_not_query_per_alert(repository, session, llm_orchestrator):
+    correlations = await repository.correlate_alerts(1)
+    assert len(session.statements) <= 2
+    assert correlations == _ANALYSIS_RESPONSE["correlations"]
+    assert llm_orchestrator.process_request.await_count == 1
+    [context] = _request_contexts(llm_orchestrator)
+    assert context["primary_alert"]["alert_id"] == 1
+    assert context["correlation_metrics"]["related_alert_count"] == 5
+
+
+@pytest.mark.asyncio
+async def test_prioritize_alerts_reads_all_alerts_in_one_query(repository, session, llm_orchestrator):
+    prioritized = await repository.prioritize_alerts([1, 2, 3, 4, 5])
+    assert len(session.statements) == 1
+    assert sorted(alert["alert_id"] for alert in prioritized) == ["1", "2", "3", "4", "5"]
+    for alert in prioritized:
+        assert alert["priority_score"] == 0.7
+        assert alert["urgency_level"] == "high"
+        assert alert["recommended_actions"] == ["contact_customer"]
+    # One analysis per alert
+    assert llm_orchestrator.process_request.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_user_data_for_analysis_reuses_cached_risk_data(repository, session):
+    await repository._get_user_risk_data(1, "30d")
+    user_data = await repository._get_user_data_for_analysis(1, "fraud", "30d")
+    assert len(session.statements) == 1
+    assert user_data["total_alerts"] == 5